@@ -1,15 +1,45 @@
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Deque, Dict, Iterable, Optional
 
+# Number of most recent turns kept in DialogContext.history
+HISTORY_MAXLEN = 100
 
-@dataclass
+
+@dataclass(slots=True)
+class Turn:
+    role: str  # Initiator
+    text: str
+    state_in: str
+    state_out: str
+    bot_response: str
+    slots: Dict[str, Any]
+
+
+@dataclass(slots=True)
 class DialogContext:
+    """
+    Per-session dialog state.
+
+    `slots` is copy-on-write: writers rebind it to a new dict instead of mutating it, so
+    each recorded turn can hold a reference to the slots dict of that turn without copying.
+    Always write through update_slot / set_slot(s) / clear_slots, never `slots[key] = ...`.
+
+    `history` only keeps the last HISTORY_MAXLEN turns; `turn_count` counts every turn.
+    """
+
     session_id: str
     current_state: str
     slots: Dict[str, Any] = field(default_factory=dict)
     slot_metadata: Dict[str, Any] = field(default_factory=dict)
-    history: List[Dict[str, Any]] = field(default_factory=list)
+    history: Deque[Turn] = field(default_factory=lambda: deque(maxlen=HISTORY_MAXLEN))
     previous_state: Optional[str] = None
+    turn_count: int = 0
+    # slots_repr() cache, valid while `slots` is still the dict it was computed from
+    _slots_repr_of: Optional[Dict[str, Any]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _slots_repr: str = field(default="", init=False, repr=False, compare=False)
 
     def record_turn(
         self,
@@ -19,15 +49,16 @@ class DialogContext:
         bot_response: str,
         slots: Dict[str, Any] = None,
     ):
-        turn = {
-            "role": "user",  # Initiator
-            "text": user_input,
-            "state_in": state_in,
-            "state_out": state_out,
-            "bot_response": bot_response,
-            "slots": slots or {},
-        }
+        turn = Turn(
+            role="user",
+            text=user_input,
+            state_in=state_in,
+            state_out=state_out,
+            bot_response=bot_response,
+            slots=slots if slots is not None else {},
+        )
         self.history.append(turn)
+        self.turn_count += 1
 
     def update_slot(self, key: str, value: Any):
         # Normalize: Try to extract value if it looks like an NLU/Enricher result
@@ -49,9 +80,30 @@ class DialogContext:
             elif "text" in first_item:
                 extracted_value = first_item["text"]
 
-        self.slots[key] = extracted_value
+        self.slots = {**self.slots, key: extracted_value}
         self.slot_metadata[key] = metadata
 
+    def set_slot(self, key: str, value: Any):
+        """Stores a value as-is (no NLU normalization), e.g. results computed by actions."""
+        self.slots = {**self.slots, key: value}
+
+    def set_slots(self, **values: Any):
+        self.slots = {**self.slots, **values}
+
+    def clear_slots(self, keys: Iterable[str]):
+        if any(key in self.slots for key in keys):
+            self.slots = {k: v for k, v in self.slots.items() if k not in keys}
+
+    def slots_repr(self) -> str:
+        """
+        repr() of the current slots, as embedded in LLM response prompts. Since writes
+        rebind `slots`, it is only recomputed after the slots actually changed.
+        """
+        if self._slots_repr_of is not self.slots:
+            self._slots_repr = repr(self.slots)
+            self._slots_repr_of = self.slots
+        return self._slots_repr
+
     def get_snapshot(self) -> Dict[str, Any]:
         return {
             "current_state": self.current_state,
@@ -1,81 +1,189 @@
+import copy
+import json
 import logging
-from typing import Any, Dict, List
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
+# Dims resolved against the current time ("tomorrow"), which must not outlive cache_ttl
+_TIME_RELATIVE_DIMS = frozenset({"time"})
+
 
 class DucklingEnricher:
     def __init__(
-        self, base_url: str = "http://duckling-server:8000", locale: str = "en_GB"
+        self,
+        base_url: str = "http://duckling-server:8000",
+        locale: str = "en_GB",
+        cache_ttl: int = 300,
+        cache_path: Optional[str] = None,
     ):
         self.base_url = base_url
         self.locale = locale
-
-    def _parse(self, text: str) -> List[Dict[str, Any]]:
-        """
-        Calls the Duckling API to parse the given text.
-        """
+        self.cache_ttl = cache_ttl
+        self._parse_url = f"{base_url}/parse"
+
+        # Reuse keep-alive connections across calls instead of a new TCP handshake per parse
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=64,
+            max_retries=Retry(total=2, backoff_factor=0.1),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # Repeated inputs (re-asked amounts, dates) skip the round-trip. The TTL bucket is part
+        # of the key so relative values like "tomorrow" don't go stale.
+        self._request_cached = lru_cache(maxsize=4096)(self._request)
+        self._dims_cached = lru_cache(maxsize=4096)(self._dims)
+        # Opt-in: behind the in-memory cache, parses that don't depend on the current time
+        # are kept in a SQLite file, so repeats across sessions skip the round-trip too.
+        # The file holds raw user utterances, so it is off unless cache_path or the
+        # RUDDER_DUCKLING_CACHE environment variable names one.
+        cache_path = cache_path or os.environ.get("RUDDER_DUCKLING_CACHE")
+        self._db = self._open_cache(cache_path) if cache_path else None
+        self._db_lock = threading.Lock()
+
+    @staticmethod
+    def _open_cache(cache_path: str) -> Optional[sqlite3.Connection]:
+        try:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            db = sqlite3.connect(
+                cache_path, isolation_level=None, check_same_thread=False
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS duckling_parses ("
+                "base_url TEXT, locale TEXT, text TEXT, response BLOB,"
+                " PRIMARY KEY (base_url, locale, text))"
+            )
+            return db
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Not using Duckling cache %s: %s", cache_path, e)
+            return None
+
+    def _load_cached(self, text: str) -> Optional[bytes]:
         try:
-            payload = {"text": text, "locale": self.locale}
-            response = requests.post(f"{self.base_url}/parse", data=payload)
-            response.raise_for_status()
-            return response.json()
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT response FROM duckling_parses"
+                    " WHERE base_url = ? AND locale = ? AND text = ?",
+                    (self.base_url, self.locale, text),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Failed to read Duckling cache: %s", e)
+            return None
+        return row[0] if row else None
+
+    def _store_cached(self, text: str, content: bytes):
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO duckling_parses VALUES (?, ?, ?, ?)",
+                    (self.base_url, self.locale, text, content),
+                )
+        except sqlite3.Error as e:
+            logger.warning("Failed to write Duckling cache: %s", e)
+
+    def _request(self, text: str, ttl_bucket: int) -> List[Dict[str, Any]]:
+        if self._db is not None:
+            content = self._load_cached(text)
+            if content is not None:
+                return json.loads(content)
+
+        payload = {"text": text, "locale": self.locale}
+        response = self.session.post(self._parse_url, data=payload, timeout=(0.3, 1.0))
+        response.raise_for_status()
+        entities = response.json()
+
+        if self._db is not None and not any(
+            entity.get("dim") in _TIME_RELATIVE_DIMS for entity in entities
+        ):
+            self._store_cached(text, response.content)
+        return entities
+
+    def _dims(self, text: str, ttl_bucket: int) -> Dict[str, Any]:
+        dims: Dict[str, Any] = {}
+        for entity in self._request_cached(text, ttl_bucket):
+            # Keep the first match per dim, as Duckling orders them by relevance
+            dims.setdefault(entity.get("dim"), entity.get("value"))
+        return dims
+
+    def _lookup(self, text: str) -> Dict[str, Any]:
+        # The returned dict is the cached one; copy before handing it out
+        try:
+            return self._dims_cached(text, int(time.time() // self.cache_ttl))
         except Exception as e:
-            logger.error(f"Failed to parse text with Duckling: {e}")
-            return []
+            logger.error("Failed to parse text with Duckling: %s", e)
+            return {}
 
-    def _get_first_value_for_dim(self, text: str, dim: str) -> Any:
+    def parse_all(self, text: str) -> Dict[str, Any]:
         """
-        Helper method to get the value of the first entity matching the dimension.
-        Returns the original text if no match is found.
+        Parses the text once and returns {dim: value} for the first entity of each dim,
+        so several enrichers asked about the same text share a single lookup.
+        Callers get their own copy, so mutating it leaves the cache intact.
         """
-        entities = self._parse(text)
-        for entity in entities:
-            if entity.get("dim") == dim:
-                return entity.get("value")
-        return text
+        return copy.deepcopy(self._lookup(text))
+
+    def _dim_value(self, text: str, dim: str) -> Any:
+        # Enriched values end up in slots, where handlers may modify them
+        return copy.deepcopy(self._lookup(text).get(dim, text))
 
     # --- Pre-defined Enrichers ---
 
     def enrich_amount_of_money(self, value: str) -> Any:
-        return self._get_first_value_for_dim(value, "amount-of-money")
+        return self._dim_value(value, "amount-of-money")
 
     def enrich_credit_card_number(self, value: str) -> Any:
-        return self._get_first_value_for_dim(value, "credit-card-number")
+        return self._dim_value(value, "credit-card-number")
 
     def enrich_distance(self, value: str) -> Any:
-        return self._get_first_value_for_dim(value, "distance")
+        return self._dim_value(value, "distance")
 
     def enrich_duration(self, value: str) -> Any:
-        return self._get_first_value_for_dim(value, "duration")
+        return self._dim_value(value, "duration")
 
     def enrich_email(self, value: str) -> Any:
-        return self._get_first_value_for_dim(value, "email")
+        return self._dim_value(value, "email")
 
     def enrich_numeral(self, value: str) -> Any:
-        return self._get_first_value_for_dim(
-            value, "number"
-        )  # Duckling dim can be 'number' or 'ordinal'
+        # Duckling dim can be 'number' or 'ordinal'
+        return self._dim_value(value, "number")
 
     def enrich_ordinal(self, value: str) -> Any:
-        return self._get_first_value_for_dim(value, "ordinal")
+        return self._dim_value(value, "ordinal")
 
     def enrich_phone_number(self, value: str) -> Any:
-        return self._get_first_value_for_dim(value, "phone-number")
+        return self._dim_value(value, "phone-number")
 
     def enrich_quantity(self, value: str) -> Any:
-        return self._get_first_value_for_dim(value, "quantity")
+        return self._dim_value(value, "quantity")
 
     def enrich_temperature(self, value: str) -> Any:
-        return self._get_first_value_for_dim(value, "temperature")
+        return self._dim_value(value, "temperature")
 
     def enrich_time(self, value: str) -> Any:
-        return self._get_first_value_for_dim(value, "time")
+        return self._dim_value(value, "time")
 
     def enrich_url(self, value: str) -> Any:
-        return self._get_first_value_for_dim(value, "url")
+        return self._dim_value(value, "url")
 
     def enrich_volume(self, value: str) -> Any:
-        return self._get_first_value_for_dim(value, "volume")
+        return self._dim_value(value, "volume")
+
+
+@lru_cache(maxsize=None)
+def get_enricher(base_url: str = "http://duckling-server:8000") -> DucklingEnricher:
+    """
+    Returns a shared DucklingEnricher per server, so callers reuse its connection pool
+    and response cache instead of starting cold.
+    """
+    return DucklingEnricher(base_url)
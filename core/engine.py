@@ -1,23 +1,98 @@
+import asyncio
+import hashlib
 import json
 import logging
-from dataclasses import dataclass, field
-from typing import Any, Dict, Optional
+import os
+import pickle
+import re
+import sys
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field, fields, is_dataclass, replace
+from enum import IntEnum
+from functools import lru_cache, partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+try:
+    # Optional: noticeably faster config parsing on cold starts
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 from .context import DialogContext
-from .llm_client import LLMClient
 from .prompt_builder import GlinerPromptBuilder
 
+if TYPE_CHECKING:
+    # Only for annotations; importing it at runtime would pull in torch and transformers
+    from .llm_client import LLMClient
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# {{slot_name}} placeholders in response templates
+_PLACEHOLDER_RE = re.compile(r"\{\{(\w+)\}\}")
+
+
+# Punctuation ignored around an utterance when matching transition keywords
+_KEYWORD_STRIP = " \t\n.,!?"
+
+# Upper bound on action states executed back-to-back within one turn
+MAX_ACTION_CHAIN = 10
+
+
+def _normalize_utterance(text: str) -> str:
+    return text.strip(_KEYWORD_STRIP).lower()
+
+
+@lru_cache(maxsize=1)
+def _compiler_fingerprint() -> bytes:
+    # StatePlan, CompiledTransition and _compile_plan all live in this file
+    with open(__file__, "rb") as f:
+        return hashlib.sha1(f.read()).digest()
+
 
-@dataclass
+def _intern_strings(obj: Any) -> Any:
+    """
+    Recursively interns dict keys and identifier-like string values (state, intent,
+    slot and function names), so hot-path dict lookups can match on identity.
+    Walks into containers and dataclasses, so compiled StatePlans can be interned too.
+    """
+    if isinstance(obj, dict):
+        return {
+            sys.intern(k) if isinstance(k, str) else k: _intern_strings(v)
+            for k, v in obj.items()
+        }
+    if isinstance(obj, (list, tuple, frozenset)):
+        return type(obj)(_intern_strings(v) for v in obj)
+    if isinstance(obj, str) and obj.isidentifier():
+        return sys.intern(obj)
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return replace(
+            obj,
+            **{f.name: _intern_strings(getattr(obj, f.name)) for f in fields(obj)},
+        )
+    return obj
+
+
+@dataclass(slots=True)
 class ConditionRegistry:
     _conditions: Dict[str, Any] = field(default_factory=dict)
 
     def register(self, name, func):
         self._conditions[name] = func
 
+    def get(self, name) -> Optional[Callable[[DialogContext, str], Optional[str]]]:
+        return self._conditions.get(name)
+
     def check(self, name, context: DialogContext, target_state: str) -> Optional[str]:
         """
         Executes the condition function.
@@ -27,32 +102,40 @@ class ConditionRegistry:
          though the user spec says it returns next state)
         """
         if name not in self._conditions:
-            logger.warning(f"Condition {name} not found")
+            logger.warning("Condition %s not found", name)
             return None
         return self._conditions[name](context, target_state)
 
 
-@dataclass
+@dataclass(slots=True)
 class ResponseRegistry:
     _responses: Dict[str, Any] = field(default_factory=dict)
 
     def register(self, name, func):
         self._responses[name] = func
 
+    def get(self, name) -> Optional[Callable[[DialogContext], Optional[str]]]:
+        return self._responses.get(name)
+
     def generate(self, name, context: DialogContext) -> Optional[str]:
         if name not in self._responses:
-            logger.warning(f"Response function {name} not found")
+            logger.warning("Response function %s not found", name)
             return None
         return self._responses[name](context)
 
 
 class ActionRegistry:
+    __slots__ = ("_actions",)
+
     def __init__(self):
         self._actions = {}
 
     def register(self, name, func):
         self._actions[name] = func
 
+    def get(self, name) -> Optional[Callable[[DialogContext], Any]]:
+        return self._actions.get(name)
+
     def execute(self, name, context: DialogContext):
         if name not in self._actions:
             raise ValueError(f"Action {name} not found")
@@ -60,13 +143,23 @@ class ActionRegistry:
 
 
 class ValidatorRegistry:
+    __slots__ = ("_validators", "_batch_validators", "_enrichers")
+
     def __init__(self):
         self._validators = {}
+        self._batch_validators = {}
         self._enrichers = {}
 
     def register_validator(self, name, func):
         self._validators[name] = func
 
+    def register_batch_validator(self, name, func):
+        """
+        Registers a vectorized form of a validator: func(values) -> iterable of bools.
+        Used by validate_batch in place of calling the scalar validator per value.
+        """
+        self._batch_validators[name] = func
+
     def register_enricher(self, name, func):
         self._enrichers[name] = func
 
@@ -75,16 +168,96 @@ class ValidatorRegistry:
             return True  # Default valid
         return self._validators[name](value)
 
+    def validate_batch(self, name, values: List[Any]) -> List[bool]:
+        if name in self._batch_validators:
+            return list(self._batch_validators[name](values))
+        return [self.validate(name, value) for value in values]
+
     def enrich(self, name, value):
         if name not in self._enrichers:
             return value
         return self._enrichers[name](value)
 
+    def enrich_batch(
+        self, items: List[Tuple[str, Any]], pool: Optional[Executor] = None
+    ) -> List[Any]:
+        """
+        Runs several (enricher_name, value) pairs in one go.
+        Enrichers are typically I/O-bound (e.g. Duckling), so they are issued concurrently
+        and the turn pays for the slowest call instead of the sum of all of them.
+        Pass a long-lived pool to avoid spinning up worker threads on every call.
+        """
+        if len(items) <= 1:
+            return [self.enrich(name, value) for name, value in items]
+        if pool is not None:
+            return list(pool.map(lambda item: self.enrich(*item), items))
+        with ThreadPoolExecutor(max_workers=min(8, len(items))) as pool:
+            return list(pool.map(lambda item: self.enrich(*item), items))
+
+
+@dataclass(slots=True, frozen=True)
+class CompiledTransition:
+    target: str
+    condition: Optional[str] = None
+    clear_slots: Tuple[str, ...] = ()
+
+
+@dataclass(slots=True, frozen=True)
+class SlotBinding:
+    enricher: Optional[str] = None
+    validator: Optional[str] = None
+
+
+_NO_BINDING = SlotBinding()
+
+
+class StateType(IntEnum):
+    """State "type" from the config; the value indexes DialogEngine's turn handlers."""
+
+    STANDARD = 0
+    ACTION = 1
+    TERMINAL = 2
+
+    @classmethod
+    def from_config(cls, name: Optional[str]) -> "StateType":
+        # Unknown or missing types behave like standard states
+        return cls.__members__.get((name or "standard").upper(), cls.STANDARD)
+
+
+@dataclass(slots=True)
+class StatePlan:
+    """
+    Lookups precomputed once per state from the (immutable) config,
+    so process_turn doesn't re-walk the raw state dicts on every turn.
+    """
+
+    type: StateType
+    # Transitions grouped by intent, in config order (later ones are tried if a condition fails)
+    intent_index: Dict[str, Tuple[CompiledTransition, ...]]
+    # Normalized keyword utterance -> intent; a match skips the NLU model entirely
+    keyword_intents: Dict[str, str]
+    # Action states only: action to run and its result -> target state
+    action_name: Optional[str]
+    action_transitions: Dict[str, str]
+    slot_bindings: Dict[str, SlotBinding]
+    slot_names: FrozenSet[str]
+    fallback_behavior: str
+    response_function: Optional[str]
+    response_template: Optional[str]
+    # Slot names referenced by response_template; empty means nothing to substitute
+    template_keys: Tuple[str, ...]
+    response_prompt: Optional[str]
+
 
 class DialogEngine:
-    def __init__(self, config_path: str, llm_client: LLMClient):
-        with open(config_path, "r") as f:
-            self.config = json.load(f)
+    def __init__(
+        self,
+        config_path: str,
+        llm_client: "LLMClient",
+        cache_dir: Optional[str] = None,
+    ):
+        with open(config_path, "rb") as f:
+            raw_config = f.read()
 
         self.llm_client = llm_client
         self.prompt_builder = GlinerPromptBuilder()
@@ -92,142 +265,271 @@ class DialogEngine:
         self.validators = ValidatorRegistry()
         self.conditions = ConditionRegistry()
         self.responses = ResponseRegistry()
+        # Shared across turns so slot enrichment does not pay thread startup each time
+        self._enrich_pool = ThreadPoolExecutor(
+            max_workers=8, thread_name_prefix="enrich"
+        )
+        # Opt-in pickled plan cache, from cache_dir or the RUDDER_PLAN_CACHE directory
+        cache_dir = cache_dir or os.environ.get("RUDDER_PLAN_CACHE")
+        self.config, self._plans = self._load_config(raw_config, cache_dir)
         self.states = self.config["states"]
+        # Until freeze(), handlers look registered functions up by name on each call
+        self._frozen = False
+        self._bind_handlers()
+        # Indexed by StateType
+        self._turn_handlers = (
+            self._standard_turn,
+            self._action_turn,
+            self._terminal_turn,
+        )
+
+    def freeze(self) -> None:
+        """
+        Call once all actions, conditions and response functions are registered. Binds each
+        state's handlers directly to the registered functions, so turns skip the by-name
+        registry lookups. Functions registered afterwards take effect on the next freeze().
+        """
+        self._frozen = True
+        self._bind_handlers()
+
+    def _bind_handlers(self) -> None:
+        # State name -> response generator specialized for that state's response config
+        self._responders: Dict[str, Callable[[DialogContext], str]] = {
+            name: self._build_responder(plan) for name, plan in self._plans.items()
+        }
+        # Action state name -> callable running its action
+        self._action_runners: Dict[str, Callable[[DialogContext], Any]] = {
+            name: self._resolve(self.actions, self.actions.execute, plan.action_name)
+            for name, plan in self._plans.items()
+            if plan.type == StateType.ACTION
+        }
+        # Condition name -> callable taking (context, target_state)
+        self._condition_checks: Dict[str, Callable[[DialogContext, str], Any]] = {
+            t.condition: self._resolve(
+                self.conditions, self.conditions.check, t.condition
+            )
+            for plan in self._plans.values()
+            for transitions in plan.intent_index.values()
+            for t in transitions
+            if t.condition is not None
+        }
+
+    def _resolve(
+        self, registry, call_by_name: Callable, name: str
+    ) -> Callable[[DialogContext], Any]:
+        # Unfrozen or unregistered names go through the registry's by-name call, which
+        # keeps its handling of missing functions
+        func = registry.get(name) if self._frozen else None
+        return func if func is not None else partial(call_by_name, name)
+
+    def _load_config(
+        self, raw_config: bytes, cache_dir: Optional[str]
+    ) -> Tuple[Dict, Dict[str, StatePlan]]:
+        """
+        Parses the config and compiles its state plans, reusing a pickled copy from
+        cache_dir when the same config has been loaded before (cache_dir=None disables this).
+        Pickles are keyed by the config and this module's source, so editing the plan
+        compiler invalidates them; unreadable ones are ignored and recompiled.
+        """
+        cache_path = None
+        if cache_dir:
+            key = hashlib.sha1(_compiler_fingerprint() + raw_config).hexdigest()
+            cache_path = os.path.join(cache_dir, f"{key}.pkl")
+            try:
+                with open(cache_path, "rb") as f:
+                    # Unpickled strings are fresh objects, not the interned ones
+                    config, plans = _intern_strings(pickle.load(f))
+                return config, plans
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning("Ignoring unreadable plan cache %s: %s", cache_path, e)
+
+        # Interned before compiling so plans share the same string objects
+        config = _intern_strings(_json_loads(raw_config))
+        plans = {
+            name: self._compile_plan(cfg) for name, cfg in config["states"].items()
+        }
+
+        if cache_path:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    pickle.dump((config, plans), f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                logger.warning("Could not write plan cache %s: %s", cache_path, e)
+
+        return config, plans
+
+    @staticmethod
+    def _compile_plan(state_config: Dict) -> StatePlan:
+        transitions = state_config.get("transitions", [])
+        intent_index: Dict[str, List[CompiledTransition]] = {}
+        action_transitions: Dict[str, str] = {}
+        keyword_candidates: Dict[str, Set[str]] = {}
+        if isinstance(transitions, dict):
+            action_transitions = dict(transitions)
+        else:
+            for t in transitions:
+                clear_slots = t.get("context_updates", {}).get("clear_slots", [])
+                intent_index.setdefault(t["intent"], []).append(
+                    CompiledTransition(
+                        t["target"], t.get("condition"), tuple(clear_slots)
+                    )
+                )
+                for keyword in t.get("keywords", []):
+                    keyword_candidates.setdefault(
+                        _normalize_utterance(keyword), set()
+                    ).add(t["intent"])
+
+        # Keywords listed under more than one intent are ambiguous and left to the NLU
+        keyword_intents = {
+            keyword: next(iter(intents))
+            for keyword, intents in keyword_candidates.items()
+            if len(intents) == 1
+        }
+
+        slot_bindings = {
+            slot: SlotBinding(cfg.get("enricher"), cfg.get("validator"))
+            for slot, cfg in state_config.get("slot_config", {}).items()
+        }
+        slot_names = frozenset(
+            state_config.get("slots_required", [])
+            + state_config.get("slots_optional", [])
+        )
+
+        response_template = state_config.get("response_template")
+        template_keys = (
+            tuple(_PLACEHOLDER_RE.findall(response_template))
+            if response_template
+            else ()
+        )
+
+        return StatePlan(
+            type=StateType.from_config(state_config.get("type")),
+            intent_index={intent: tuple(ts) for intent, ts in intent_index.items()},
+            keyword_intents=keyword_intents,
+            action_name=state_config.get("action_name"),
+            action_transitions=action_transitions,
+            slot_bindings=slot_bindings,
+            slot_names=slot_names,
+            fallback_behavior=state_config.get("fallback_behavior", "oos"),
+            response_function=state_config.get("response_function"),
+            response_template=response_template,
+            template_keys=template_keys,
+            response_prompt=state_config.get("response_prompt"),
+        )
+
+    def warmup(self, text: str = "hello") -> None:
+        """
+        Runs one NLU call in the start state, so model loading and first-call setup
+        happen before the first user turn instead of during it.
+        """
+        start_state = self.config["settings"]["start_state"]
+        self._run_nlu(text, start_state, None)
 
     def start_session(self, session_id: str) -> DialogContext:
         start_state = self.config["settings"]["start_state"]
         return DialogContext(session_id=session_id, current_state=start_state)
 
     def process_turn(self, user_input: str, context: DialogContext) -> str:
-        logger.info(f"Processing turn: {user_input} in state {context.current_state}")
+        logger.info(
+            "Processing turn: %s in state %s", user_input, context.current_state
+        )
+        plan = self._plans[context.current_state]
+        return self._turn_handlers[plan.type](user_input, context, plan)
+
+    async def aprocess_turn(self, user_input: str, context: DialogContext) -> str:
+        """
+        Awaitable process_turn for asyncio servers. The turn runs in a worker thread so
+        the blocking model and Duckling calls don't stall the event loop, and concurrent
+        sessions can share GLiNER forward passes through BatchingGlinerClient.
+        """
+        return await asyncio.to_thread(self.process_turn, user_input, context)
+
+    def _action_turn(
+        self, user_input: str, context: DialogContext, plan: StatePlan
+    ) -> str:
+        # standard flow: User Input -> NLU -> Slot -> Transition -> (Action -> Transition) -> Response
+        # But if we are in an action state, it usually means we auto-transitioned here.
+        state_in = context.current_state
+        bot_response = self._handle_action_state(context, plan)
+        # If action state returns a response, we stop here.
+        # We need to record this.
+        context.record_turn(
+            user_input,
+            state_in,
+            context.current_state,
+            bot_response,
+            context.slots,
+        )
+        return bot_response
 
+    def _terminal_turn(
+        self, user_input: str, context: DialogContext, plan: StatePlan
+    ) -> str:
+        # State IN was terminal (or previous was terminal), we reset to start.
+        context.current_state = self.config["settings"]["start_state"]
+        return self._standard_turn(
+            user_input, context, self._plans[context.current_state]
+        )
+
+    def _standard_turn(
+        self, user_input: str, context: DialogContext, plan: StatePlan
+    ) -> str:
         state_in = context.current_state
-        current_state_config = self.states[context.current_state]
         bot_response = ""
 
-        # 1. Check if current state has an Action (Immediate Execution)
-        if current_state_config.get("type") == "action":
-            # standard flow: User Input -> NLU -> Slot -> Transition -> (Action -> Transition) -> Response
-            # But if we are in an action state, it usually means we auto-transitioned here.
-
-            bot_response = self._handle_action_state(context, current_state_config)
-            # If action state returns a response, we stop here.
-            # We need to record this.
-            context.record_turn(
-                user_input,
-                state_in,
-                context.current_state,
-                bot_response,
-                context.slots.copy(),
-            )
-            return bot_response
-        elif current_state_config.get("type") == "terminal":
-            context.current_state = self.config["settings"]["start_state"]
-            current_state_config = self.states[context.current_state]
-            # State IN was terminal (or previous was terminal), we reset to start.
-            state_in = context.current_state
-
-        # 2. NLU Step: Determine Intent
-        nlu_result = self._run_nlu(user_input, current_state_config, context)
+        # 2. NLU Step: Determine Intent (bare keyword replies like "yes" skip the model)
+        nlu_result = self._match_keywords(user_input, plan) or self._run_nlu(
+            user_input, context.current_state, context
+        )
         intent = nlu_result.get("intent")
         entities = nlu_result.get("entities", {})
 
         # 3. Enrich & Validate Slots (enrich first so validators see normalized values)
-        slot_config = current_state_config.get("slot_config", {})
-        for k, v in entities.items():
-            if v:
-                config_item = slot_config.get(k, {})
-
-                # Enrichment first
-                enricher_name = config_item.get("enricher")
-                if enricher_name:
-                    enricher_response = self.validators.enrich(
-                        enricher_name, v[0]["text"]
-                    )
-                    v[0]["value"] = enricher_response
-
-                # Validation (on enriched value)
-                validator_name = config_item.get("validator")
-                if validator_name:
-                    # Use enriched value if available, otherwise raw text
-                    val_to_check = v[0].get("value", v[0].get("text"))
-                    if not self.validators.validate(validator_name, val_to_check):
-                        logger.warning(
-                            f"Slot {k}={val_to_check} failed validation {validator_name}"
-                        )
-                        continue
-
-                context.update_slot(k, v)
+        self._fill_slots(entities, plan, context)
 
         # 4. Handle State Transitions
-        next_state = self._resolve_transition(current_state_config, intent, context)
-        print(f"\nNext State: {next_state}\n")
+        next_state = self._resolve_transition(plan, intent, context)
+        logger.debug("Next State: %s", next_state)
 
         if next_state:
             context.previous_state = context.current_state
             context.current_state = next_state
 
             # Check if the new state is an action state and run it immediately
-            new_state_config = self.states[next_state]
+            new_plan = self._plans[next_state]
 
             # Re-run NLU when transitioning to a state with different slots
             # This fixes entity extraction when switching between capabilities
             # Skip for action states as they don't use NLU classification
-            is_action_state = new_state_config.get("type") == "action"
-            new_slots = set(
-                new_state_config.get("slots_required", [])
-                + new_state_config.get("slots_optional", [])
-            )
-            current_slots = set(
-                current_state_config.get("slots_required", [])
-                + current_state_config.get("slots_optional", [])
-            )
+            is_action_state = new_plan.type == StateType.ACTION
 
             # Re-run NLU if new state has slots that weren't in the current state
-            needs_re_nlu = new_slots and (new_slots != current_slots)
+            needs_re_nlu = new_plan.slot_names and (
+                new_plan.slot_names != plan.slot_names
+            )
 
             if needs_re_nlu and not is_action_state:
                 logger.info(
-                    f"Re-running NLU for state {next_state} to capture entities"
+                    "Re-running NLU for state %s to capture entities", next_state
                 )
-                re_nlu_result = self._run_nlu(user_input, new_state_config, context)
+                re_nlu_result = self._run_nlu(user_input, next_state, context)
                 re_entities = re_nlu_result.get("entities", {})
 
                 # Enrich & Validate the newly extracted slots
-                new_slot_config = new_state_config.get("slot_config", {})
-                for k, v in re_entities.items():
-                    if v:
-                        config_item = new_slot_config.get(k, {})
-
-                        # Enrichment first
-                        enricher_name = config_item.get("enricher")
-                        if enricher_name:
-                            enricher_response = self.validators.enrich(
-                                enricher_name, v[0]["text"]
-                            )
-                            v[0]["value"] = enricher_response
-
-                        # Validation (on enriched value)
-                        validator_name = config_item.get("validator")
-                        if validator_name:
-                            val_to_check = v[0].get("value", v[0].get("text"))
-                            if not self.validators.validate(
-                                validator_name, val_to_check
-                            ):
-                                logger.warning(
-                                    f"Slot {k}={val_to_check} failed validation {validator_name}"
-                                )
-                                continue
-
-                        context.update_slot(k, v)
-
-            if new_state_config.get("type") == "action":
-                bot_response = self._handle_action_state(context, new_state_config)
+                self._fill_slots(re_entities, new_plan, context)
+
+            if is_action_state:
+                bot_response = self._handle_action_state(context, new_plan)
             else:
-                bot_response = self._generate_response(new_state_config, context)
+                bot_response = self._generate_response(next_state, context)
         else:
             # Fallback
-            bot_response = self._handle_fallback(context, current_state_config)
+            bot_response = self._handle_fallback(context, plan)
 
         # Record the full turn
         context.record_turn(
@@ -235,113 +537,208 @@ class DialogEngine:
             state_in,
             context.current_state,
             bot_response,
-            context.slots.copy(),
+            context.slots,
         )
 
         return bot_response
 
+    def _fill_slots(
+        self, entities: Dict, plan: StatePlan, context: DialogContext
+    ) -> None:
+        # Gather all enrichments first so they go out as a single batch
+        pending = []
+        for k, v in entities.items():
+            if v:
+                enricher_name = plan.slot_bindings.get(k, _NO_BINDING).enricher
+                if enricher_name:
+                    pending.append((v, enricher_name))
+
+        enriched = self.validators.enrich_batch(
+            [(enricher_name, v[0]["text"]) for v, enricher_name in pending],
+            pool=self._enrich_pool,
+        )
+        for (v, _), enricher_response in zip(pending, enriched):
+            v[0]["value"] = enricher_response
+
+        # Validation (on enriched values), one call per validator for all of its slots
+        values_by_validator: Dict[str, List[Tuple[str, Any]]] = {}
+        for k, v in entities.items():
+            if v:
+                validator_name = plan.slot_bindings.get(k, _NO_BINDING).validator
+                if validator_name:
+                    # Use enriched value if available, otherwise raw text
+                    val_to_check = v[0].get("value", v[0].get("text"))
+                    values_by_validator.setdefault(validator_name, []).append(
+                        (k, val_to_check)
+                    )
+
+        rejected = set()
+        for validator_name, items in values_by_validator.items():
+            results = self.validators.validate_batch(
+                validator_name, [val for _, val in items]
+            )
+            for (k, val_to_check), is_valid in zip(items, results):
+                if not is_valid:
+                    logger.warning(
+                        "Slot %s=%s failed validation %s",
+                        k,
+                        val_to_check,
+                        validator_name,
+                    )
+                    rejected.add(k)
+
+        for k, v in entities.items():
+            if v and k not in rejected:
+                context.update_slot(k, v)
+
+    def _match_keywords(self, user_input: str, plan: StatePlan) -> Optional[Dict]:
+        if not plan.keyword_intents:
+            return None
+        intent = plan.keyword_intents.get(_normalize_utterance(user_input))
+        if intent is None:
+            return None
+        # The whole utterance is the keyword, so there are no entities to extract
+        return {"intent": intent, "entities": {}}
+
     def _run_nlu(
-        self, user_input: str, state_config: Dict, context: DialogContext
+        self, user_input: str, state_name: str, context: DialogContext
     ) -> Dict:
-        schema_config = self.prompt_builder.build_schema(state_config)
+        state_config = self.states[state_name]
+        schema_config = self.prompt_builder.build_schema(state_config, state_name)
         return self.llm_client.predict(user_input, schema_config=schema_config)
         # For now, I'm not using generative models for NLU as I couldn't find a good open source option.
         # system_prompt = self.prompt_builder.build_constraint_prompt(state_config, context.get_snapshot())
         # return self.llm_client.predict(user_input, system_prompt=system_prompt)
 
     def _resolve_transition(
-        self, state_config: Dict, intent: str, context: DialogContext
+        self, plan: StatePlan, intent: str, context: DialogContext
     ) -> Optional[str]:
-        transitions = state_config.get("transitions", [])
-        for t in transitions:
-            if t["intent"] == intent:
-                # Custom Condition Function
-                if "condition" in t:
-                    condition_func = t["condition"]
-                    target_state = t["target"]
-                    # Expecting function to return the next valid state
-                    next_state = self.conditions.check(
-                        condition_func, context, target_state
-                    )
-                    if next_state:
-                        # Context Updates (Clearing Slots) - Apply here if transition happens?
-                        if "context_updates" in t:
-                            to_clear = t["context_updates"].get("clear_slots", [])
-                            for slot_name in to_clear:
-                                if slot_name in context.slots:
-                                    del context.slots[slot_name]
-                        return next_state
+        for t in plan.intent_index.get(intent, ()):
+            if t.condition is not None:
+                # Custom Condition Function, expected to return the next valid state
+                next_state = self._condition_checks[t.condition](context, t.target)
+                if not next_state:
                     continue
+            else:
+                next_state = t.target
 
-                # Context Updates (Clearing Slots)
-                if "context_updates" in t:
-                    to_clear = t["context_updates"].get("clear_slots", [])
-                    for slot_name in to_clear:
-                        if slot_name in context.slots:
-                            del context.slots[slot_name]
+            # Context Updates (Clearing Slots)
+            if t.clear_slots:
+                context.clear_slots(t.clear_slots)
 
-                return t["target"]
+            return next_state
         return None
 
-    def _handle_action_state(self, context: DialogContext, state_config: Dict) -> str:
-        action_name = state_config.get("action_name")
+    def _handle_action_state(self, context: DialogContext, plan: StatePlan) -> str:
+        # Drive chained action states iteratively until one hands over to a state
+        # that produces the response
+        for _ in range(MAX_ACTION_CHAIN):
+            next_state = self._run_action(context, plan)
+            if not next_state:
+                return "System Error: Invalid State Transition"
+
+            context.previous_state = context.current_state
+            context.current_state = next_state
+            plan = self._plans[next_state]
+            if plan.type != StateType.ACTION:
+                return self._generate_response(next_state, context)
+
+        logger.error(
+            "Action chain exceeded %d steps at state %s",
+            MAX_ACTION_CHAIN,
+            context.current_state,
+        )
+        return "System Error: Invalid State Transition"
+
+    def _run_action(self, context: DialogContext, plan: StatePlan) -> Optional[str]:
         result = "success"  # Default
         try:
             # Action can now return a result string
-            exec_result = self.actions.execute(action_name, context)
+            exec_result = self._action_runners[context.current_state](context)
             if exec_result:
                 result = str(exec_result)
         except Exception as e:
-            logger.error(f"Action failed: {e}")
+            logger.error("Action failed: %s", e)
             result = "error"
 
         # Resolve transition based on result
-        transitions = state_config.get("transitions", {})
-        next_state = transitions.get(result)
+        next_state = plan.action_transitions.get(result)
 
         if not next_state:
             logger.error(
-                f"No transition found for action result: {result} in state {context.current_state}"
+                "No transition found for action result: %s in state %s",
+                result,
+                context.current_state,
             )
-            return "System Error: Invalid State Transition"
+        return next_state
+
+    def _generate_response(self, state: str, context: DialogContext) -> str:
+        return self._responders[state](context)
+
+    def _build_responder(self, plan: StatePlan) -> Callable[[DialogContext], str]:
+        """
+        Resolves which of the state's response options apply once, so a turn calls a
+        single closure instead of re-checking the function/template/prompt chain.
+        """
+        fallback = self._build_static_responder(plan)
+        if plan.response_function is None:
+            return fallback
 
-        context.previous_state = context.current_state
-        context.current_state = next_state
+        # Custom Response Function; falls through to the static response if it returns nothing
+        generate = self._resolve(
+            self.responses, self.responses.generate, plan.response_function
+        )
 
-        # Recursive call to handle the NEXT state (which usually has the response)
-        return self._generate_response(self.states[next_state], context)
+        def respond(context: DialogContext) -> str:
+            return generate(context) or fallback(context)
 
-    def _generate_response(self, state_config: Dict, context: DialogContext) -> str:
-        # Custom Response Function
-        if "response_function" in state_config:
-            resp_func = state_config["response_function"]
-            response = self.responses.generate(resp_func, context)
-            if response:
-                return response
+        return respond
 
+    def _build_static_responder(
+        self, plan: StatePlan
+    ) -> Callable[[DialogContext], str]:
         # Static Template
-        if "response_template" in state_config:
-            template = state_config["response_template"]
-            # Simple variable substitution
-            for key, value in context.slots.items():
-                # Value is already normalized by context.update_slot
-                template = template.replace(f"{{{{{key}}}}}", str(value))
-            return template
+        template = plan.response_template
+        if template is not None:
+            if not plan.template_keys:
+                return lambda context: template
+
+            # Split once at build time: literals at even indices, slot names at odd ones.
+            # Placeholders for missing slots are left in the output as written.
+            segments = _PLACEHOLDER_RE.split(template)
+            slot_fields = tuple(
+                (i, segments[i], "{{%s}}" % segments[i])
+                for i in range(1, len(segments), 2)
+            )
+
+            def render(context: DialogContext) -> str:
+                # Values are already normalized by context.update_slot
+                slots = context.slots
+                out = segments.copy()
+                for i, key, placeholder in slot_fields:
+                    out[i] = str(slots[key]) if key in slots else placeholder
+                return "".join(out)
+
+            return render
 
         # LLM Generation
-        if "response_prompt" in state_config:
-            prompt = state_config["response_prompt"]
-            # Formatting slots into prompt
-            formatted_prompt = prompt + f"\nContext: {context.slots}"
-            return self.llm_client.generate_response(formatted_prompt)
+        if plan.response_prompt is not None:
+            prompt_prefix = plan.response_prompt + "\nContext: "
+
+            def prompt_llm(context: DialogContext) -> str:
+                # Formatting slots into prompt
+                formatted_prompt = prompt_prefix + context.slots_repr()
+                return self.llm_client.generate_response(formatted_prompt)
+
+            return prompt_llm
 
-        return "Thinking..."
+        return lambda context: "Thinking..."
 
-    def _handle_fallback(self, context: DialogContext, state_config: Dict) -> str:
-        behavior = state_config.get("fallback_behavior", "oos")
+    def _handle_fallback(self, context: DialogContext, plan: StatePlan) -> str:
+        behavior = plan.fallback_behavior
         if behavior == "oos":
             context.current_state = "out_of_scope"
-            return self._generate_response(self.states["out_of_scope"], context)
+            return self._generate_response("out_of_scope", context)
         elif behavior == "ask_reclassify":
             return "I didn't quite get that. Could you clarify?"  # Simplified for now
         return "I am confused."
@@ -1,18 +1,92 @@
-from typing import Any, Dict
+import copy
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
-from gliner2 import GLiNER2
+# Intra-op threads for GLiNER inference. Single-utterance forwards are latency-bound, and
+# on many-core hosts the default (one thread per core) spends more time in fork/join
+# than in the matmuls.
+NUM_THREADS = min(4, os.cpu_count() or 1)
+# Predictions remembered by (utterance, state schema); short replies repeat a lot
+PREDICT_CACHE_SIZE = 1024
+# Distinct schema configs (roughly one per dialog state) whose schema object is kept
+SCHEMA_CACHE_SIZE = 64
+
+
+def _configure_torch_threads(num_threads: int):
+    # OpenMP/MKL read these when torch is first imported; explicit settings win
+    num_threads = int(os.environ.setdefault("OMP_NUM_THREADS", str(num_threads)))
+    os.environ.setdefault("MKL_NUM_THREADS", str(num_threads))
+
+    import torch
+
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Can only be set before any inter-op work has run, e.g. by another model
+        pass
 
 
 class GlinerClient:
-    def __init__(self, model_id: str = "fastino/gliner2-base-v1"):
-        print(f"Loading GLiNER model: {model_id}...")
+    INCLUDE_CONFIDENCE = True
+    # Max texts per forward pass in predict_batch
+    BUCKET_SIZE = 8
+
+    def __init__(
+        self,
+        model_id: str = "fastino/gliner2-base-v1",
+        quantization: Optional[Literal["fp32", "int8"]] = None,
+    ):
+        # int8 dynamically quantizes the Linear layers, which dominate CPU inference time
+        quantization = quantization or os.environ.get(
+            "RUDDER_GLINER_QUANTIZATION", "fp32"
+        )
+        _configure_torch_threads(NUM_THREADS)
+        # Deferred so importing this module (e.g. for BatchingGlinerClient) stays cheap
+        from gliner2 import GLiNER2
+
+        print(f"Loading GLiNER model: {model_id} ({quantization})...")
         self.extractor = GLiNER2.from_pretrained(model_id)
+        self.extractor.eval()
+        if quantization == "int8":
+            import torch
+
+            torch.ao.quantization.quantize_dynamic(
+                self.extractor, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+            )
+        elif quantization != "fp32":
+            raise ValueError(f"Unknown quantization: {quantization}")
+        # Both keyed by the serialized schema config, so equal configs share entries
+        # however the caller builds them
+        self._schema_cached = lru_cache(maxsize=SCHEMA_CACHE_SIZE)(
+            self._schema_from_key
+        )
+        self._predict_cached = lru_cache(maxsize=PREDICT_CACHE_SIZE)(
+            self._predict_uncached
+        )
         print("GLiNER model loaded.")
 
-    def predict(self, text: str, schema_config: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Uses GLiNER to extract entities and classify intent based on schema.
-        """
+    @staticmethod
+    def _schema_key(schema_config: Dict[str, Any]) -> str:
+        # GlinerSchema configs from GlinerPromptBuilder carry a key computed when they
+        # were built; anything else is serialized here, keeping key order, as entity
+        # order is part of what the model sees
+        key = getattr(schema_config, "key", None)
+        if key is not None:
+            return key
+        return json.dumps(schema_config, separators=(",", ":"))
+
+    def _schema_from_key(self, schema_key: str):
+        return self._build_schema(json.loads(schema_key))
+
+    def _build_schema(self, schema_config: Dict[str, Any]):
         # Create schema object from config
         schema = self.extractor.create_schema()
 
@@ -23,23 +97,153 @@ class GlinerClient:
             label, classes = schema_config["classification"]
             schema = schema.classification(label, classes)
 
+        return schema
+
+    def _format_output(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        # With confidence enabled GLiNER returns {"label": ..., "confidence": ...},
+        # and the intent key is absent when no classification was requested
+        intent_obj = results.get("intent") or {}
+        if self.INCLUDE_CONFIDENCE:
+            intent = intent_obj.get("label", "UNKNOWN")
+        else:
+            intent = intent_obj or "UNKNOWN"
+
+        # Interned so the engine's intent/slot lookups against config keys hit on identity
+        entities = {sys.intern(k): v for k, v in results.get("entities", {}).items()}
+        return {"entities": entities, "intent": sys.intern(intent)}
+
+    def predict(self, text: str, schema_config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Uses GLiNER to extract entities and classify intent based on schema.
+        Repeated (text, schema) pairs are served from a cache; callers get their own copy.
+        """
+        schema_key = self._schema_key(schema_config)
+        return copy.deepcopy(self._predict_cached(text, schema_key))
+
+    def _predict_uncached(self, text: str, schema_key: str) -> Dict[str, Any]:
+        schema = self._schema_cached(schema_key)
+
         # Perform extraction
-        include_confidence = True
         results = self.extractor.extract(
-            text, schema, include_confidence=include_confidence
+            text, schema, include_confidence=self.INCLUDE_CONFIDENCE
         )
 
-        output = {
-            "entities": results.get("entities", {}),
-            "intent": results.get("intent", "UNKNOWN").get("label", "UNKNOWN")
-            if include_confidence
-            else results.get("intent", "UNKNOWN"),
-        }
+        return self._format_output(results)
 
-        return output
+    def predict_batch(
+        self, items: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Runs predict for several (text, schema_config) pairs in one batch_extract call.
+        Each text keeps its own schema, so requests from different states can share a batch.
+        Texts are grouped by length into forward passes of up to BUCKET_SIZE, so short
+        utterances aren't padded to the longest one; results come back in input order.
+        """
+        if not items:
+            return []
+
+        order = sorted(range(len(items)), key=lambda i: len(items[i][0]))
+        texts = [items[i][0] for i in order]
+        schemas = [self._schema_cached(self._schema_key(items[i][1])) for i in order]
+
+        results = self.extractor.batch_extract(
+            texts,
+            schemas,
+            batch_size=min(len(items), self.BUCKET_SIZE),
+            include_confidence=self.INCLUDE_CONFIDENCE,
+        )
+
+        outputs: List[Dict[str, Any]] = [None] * len(items)
+        for i, r in zip(order, results):
+            outputs[i] = self._format_output(r)
+        return outputs
 
     def generate_response(self, prompt: str) -> str:
         """
         Gliner is not a generative model, so it returns the prompt as is.
         """
         return prompt
+
+
+_client: Optional[GlinerClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> GlinerClient:
+    """
+    Returns the process-wide GlinerClient, loading the model on first use, so entry points
+    that each need a client share one copy of the weights.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GlinerClient()
+    return _client
+
+
+class LazyGlinerClient:
+    """
+    Stand-in for get_client() that defers loading the model until it is first used, so
+    a session that ends before any NLU call never pays for it.
+    """
+
+    def __getattr__(self, name: str):
+        return getattr(get_client(), name)
+
+
+class BatchingGlinerClient:
+    """
+    Drop-in wrapper around GlinerClient that coalesces concurrent predict calls.
+
+    Calls made from different threads (e.g. one per session) are queued and a background
+    worker runs up to max_batch of them, arriving within max_wait_ms of each other,
+    through a single predict_batch forward pass.
+    """
+
+    def __init__(
+        self, client: GlinerClient, max_batch: int = 16, max_wait_ms: float = 5
+    ):
+        self.client = client
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._queue: "queue.Queue[Tuple[str, Dict[str, Any], Future]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def predict(self, text: str, schema_config: Dict[str, Any]) -> Dict[str, Any]:
+        future: Future = Future()
+        self._queue.put((text, schema_config, future))
+        return future.result()
+
+    def generate_response(self, prompt: str) -> str:
+        return self.client.generate_response(prompt)
+
+    def _collect(self) -> List[Tuple[str, Dict[str, Any], Future]]:
+        # Block for the first request, then wait briefly for more to join the batch
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = self.client.predict_batch(
+                    [(text, schema_config) for text, schema_config, _ in batch]
+                )
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, _, future), result in zip(batch, results):
+                future.set_result(result)
@@ -1,69 +1,167 @@
+import copy
+import importlib.util
 import json
-from typing import Any, Dict, List
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
-from transformers import AutoModelForCausalLM, AutoTokenizer
+import torch
+from transformers import (
+    AutoModelForCausalLM,
+    AutoTokenizer,
+    BitsAndBytesConfig,
+    StoppingCriteria,
+    StoppingCriteriaList,
+)
 
+logger = logging.getLogger(__name__)
+
+# Number of distinct system prompts whose prefilled KV cache is kept around
+PREFIX_CACHE_SIZE = 8
+# Generated outputs remembered by exact chat messages (repeated "yes", "show balances", ...)
+RESPONSE_CACHE_SIZE = 1024
+# Both prompts ask for one small JSON object; generation also stops as soon as it closes
+MAX_NEW_TOKENS = 256
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _pick_attn_implementation() -> str:
+    """
+    FlashAttention-2 needs an Ampere or newer GPU and the optional flash-attn package;
+    everywhere else PyTorch's fused SDPA kernels are the fastest available option.
+    """
+    if (
+        torch.cuda.is_available()
+        and torch.cuda.get_device_capability()[0] >= 8
+        and importlib.util.find_spec("flash_attn") is not None
+    ):
+        return "flash_attention_2"
+    return "sdpa"
+
+
+def _quantization_config(quantization: str) -> Optional[BitsAndBytesConfig]:
+    """
+    Weight quantization for the decode-bound model: int8/int4 move 2-4x fewer weight
+    bytes per generated token. Requires the optional bitsandbytes package and a CUDA GPU.
+    """
+    if quantization == "bf16":
+        return None
+    if quantization == "int8":
+        return BitsAndBytesConfig(load_in_8bit=True)
+    if quantization == "int4":
+        return BitsAndBytesConfig(
+            load_in_4bit=True,
+            bnb_4bit_compute_dtype=torch.bfloat16,
+            bnb_4bit_quant_type="nf4",
+            bnb_4bit_use_double_quant=True,
+        )
+    raise ValueError(f"Unknown quantization: {quantization}")
+
+
+def _extract_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parses the first JSON object in the model output, ignoring any text before or after it.
+    Returns None if there is no object; raises json.JSONDecodeError if it is malformed.
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+    return _JSON_DECODER.raw_decode(text, start)[0]
+
+
+class _JsonObjectComplete(StoppingCriteria):
+    """
+    Stops generation once the first top-level JSON object in the output is closed, so the
+    model doesn't keep decoding after the part predict/generate_response actually parse.
+    """
+
+    def __init__(self, tokenizer, prompt_len: int):
+        self.tokenizer = tokenizer
+        self.prompt_len = prompt_len
+        self._seen = 0
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escaped = False
+
+    def _feed(self, text: str) -> bool:
+        for ch in text:
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"' and self._started:
+                self._in_string = True
+            elif ch == "{":
+                self._started = True
+                self._depth += 1
+            elif ch == "}" and self._started:
+                self._depth -= 1
+                if self._depth == 0:
+                    return True
+        return False
+
+    def __call__(self, input_ids: "torch.LongTensor", scores, **kwargs):
+        # Only decode the tokens added since the last call
+        new_ids = input_ids[0, self.prompt_len + self._seen :]
+        self._seen += len(new_ids)
+        done = self._feed(self.tokenizer.decode(new_ids, skip_special_tokens=True))
+        return torch.full(
+            (input_ids.shape[0],), done, dtype=torch.bool, device=input_ids.device
+        )
+
+
+class BaseLLMClient(ABC):
+    """
+    predict / generate_response on top of a chat model. Subclasses load the model and
+    implement _generate_uncached, which decodes one conversation greedily.
+    """
 
-class LLMClient:
     def __init__(self):
-        # Load model and tokenizer
-        self.model_id = "LiquidAI/LFM2-350M-Extract"
-        print(f"Loading model: {self.model_id}...")
-        self.model = AutoModelForCausalLM.from_pretrained(
-            self.model_id,
-            device_map="auto",
-            dtype="bfloat16",
-            # attn_implementation="flash_attention_2" # uncomment on compatible GPU
+        # Decoding is greedy, so the same conversation always yields the same text
+        self._generate_cached = lru_cache(maxsize=RESPONSE_CACHE_SIZE)(
+            self._generate_uncached
         )
-        self.tokenizer = AutoTokenizer.from_pretrained(self.model_id)
-        print("Model loaded.")
 
     def _generate(
-        self, messages: List[Dict[str, str]], max_new_tokens: int = 1024
+        self, messages: List[Dict[str, str]], max_new_tokens: int = MAX_NEW_TOKENS
     ) -> str:
-        input_ids = self.tokenizer.apply_chat_template(
-            messages,
-            add_generation_prompt=True,
-            return_tensors="pt",
-            tokenize=True,
-        ).to(self.model.device)
-
-        output = self.model.generate(
-            input_ids,
-            do_sample=False,
-            max_new_tokens=max_new_tokens,
-        )
+        key = tuple((m["role"], m["content"]) for m in messages)
+        return self._generate_cached(key, max_new_tokens)
 
-        # Decode only the new tokens
-        generated_ids = output[0][len(input_ids[0]) :]
-        return self.tokenizer.decode(
-            generated_ids, skip_special_tokens=True, temperature=0
-        )
+    @abstractmethod
+    def _generate_uncached(
+        self, key: Tuple[Tuple[str, str], ...], max_new_tokens: int
+    ) -> str:
+        """Greedily decodes the conversation given as ((role, content), ...) pairs."""
 
     def predict(self, prompt: str, system_prompt: str = "") -> Dict[str, Any]:
         """
-        Uses LFM2-350M-Extract to predict intent and entities.
+        Uses the chat model to predict intent and entities.
         """
         messages = [
             {"role": "system", "content": system_prompt},
-            {"role": "user", "content": f"User Input: {prompt}"},
+            {"role": "user", "content": f"User Input: {prompt.strip()}"},
         ]
         response_text = self._generate(messages)
-        print(f"\n[LLM Raw Output]: {response_text}\n")
+        logger.debug("LLM raw output: %s", response_text)
 
         # Extract JSON
         try:
-            # simple heuristic to find JSON block
-            start = response_text.find("{")
-            end = response_text.rfind("}") + 1
-            if start != -1 and end != -1:
-                json_str = response_text[start:end]
-                return json.loads(json_str)
+            data = _extract_json(response_text)
+            if data is not None:
+                return data
             else:
-                print("Error: No JSON found in response")
+                logger.warning("No JSON found in LLM response")
                 return {"intent": "UNKNOWN", "entities": {}}
         except json.JSONDecodeError as e:
-            print(f"Error parsing JSON: {e}")
+            logger.warning("Error parsing JSON from LLM response: %s", e)
             return {"intent": "UNKNOWN", "entities": {}}
 
     def generate_response(self, prompt: str) -> str:
@@ -71,6 +169,19 @@ class LLMClient:
         Generates natural language response.
         Enforces JSON output to reliably extract text despite model bias.
         """
+        response_text = self._generate(self._response_messages(prompt))
+        # Primary: try to parse extracted JSON and return the text content.
+        try:
+            data = _extract_json(response_text)
+            if data is not None and "answer" in data:
+                return data["answer"]
+        except Exception:
+            pass
+
+        # Fallback: assume raw text if parsing failed
+        return response_text
+
+    def _response_messages(self, prompt: str) -> List[Dict[str, str]]:
         # Attempt to split provided prompt and context to reformat for the model
         parts = prompt.split("\nContext: ")
         core_instruction = parts[0]
@@ -88,23 +199,137 @@ tone of the response. You MUST output strict JSON in the following format:
             f"Context: {context_str}\nInstruction: {core_instruction}\nOutput:"
         )
 
-        messages = [
+        return [
             {"role": "system", "content": system_instructions},
             {"role": "user", "content": formatted_user_content},
         ]
 
-        response_text = self._generate(messages)
-        # Primary: try to parse extracted JSON and return the text content.
-        try:
-            start = response_text.find("{")
-            end = response_text.rfind("}") + 1
-            if start != -1 and end != -1:
-                json_str = response_text[start:end]
-                data = json.loads(json_str)
-                if "answer" in data:
-                    return data["answer"]
-        except Exception:
-            pass
 
-        # Fallback: assume raw text if parsing failed
-        return response_text
+class LLMClient(BaseLLMClient):
+    def __init__(
+        self,
+        quantization: Literal["bf16", "int8", "int4"] = "bf16",
+        assistant_model_id: Optional[str] = None,
+    ):
+        # Load model and tokenizer
+        self.model_id = "LiquidAI/LFM2-350M-Extract"
+        print(f"Loading model: {self.model_id}...")
+        self.model = AutoModelForCausalLM.from_pretrained(
+            self.model_id,
+            device_map="auto",
+            dtype="bfloat16",
+            attn_implementation=_pick_attn_implementation(),
+            quantization_config=_quantization_config(quantization),
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_id)
+
+        # Optional small draft model for assisted (speculative) decoding: it proposes a few
+        # tokens and the main model verifies them in one forward pass. Output is unchanged
+        # under greedy decoding. The draft must share the main model's tokenizer.
+        self.assistant_model = None
+        if assistant_model_id:
+            print(f"Loading assistant model: {assistant_model_id}...")
+            self.assistant_model = AutoModelForCausalLM.from_pretrained(
+                assistant_model_id, device_map="auto", dtype="bfloat16"
+            )
+
+        # system prompt -> (templated text, token ids, KV cache after prefilling them)
+        self._prefix_caches: "OrderedDict[str, Any]" = OrderedDict()
+        super().__init__()
+
+        # Uncompiled forward, for outputs that outlive the call (see _system_prefix)
+        self._eager_forward = self.model.forward
+        # bitsandbytes kernels don't go through CUDA graph capture, so only compile bf16
+        if self.model.device.type == "cuda" and quantization == "bf16":
+            # Compile only the forward pass so generate() keeps working; "reduce-overhead"
+            # captures CUDA graphs for the per-token decode steps
+            self.model.forward = torch.compile(
+                self.model.forward, mode="reduce-overhead", fullgraph=False
+            )
+        print("Model loaded.")
+
+    def _generate_uncached(
+        self, key: Tuple[Tuple[str, str], ...], max_new_tokens: int
+    ) -> str:
+        messages = [{"role": role, "content": content} for role, content in key]
+        generate_kwargs = self._generate_kwargs(messages, max_new_tokens)
+        output = self.model.generate(**generate_kwargs)
+
+        # Decode only the new tokens
+        generated_ids = output[0][generate_kwargs["input_ids"].shape[1] :]
+        return self.tokenizer.decode(
+            generated_ids, skip_special_tokens=True, temperature=0
+        )
+
+    def _generate_kwargs(
+        self, messages: List[Dict[str, str]], max_new_tokens: int
+    ) -> Dict[str, Any]:
+        text = self.tokenizer.apply_chat_template(
+            messages, add_generation_prompt=True, tokenize=False
+        )
+
+        past_key_values = None
+        # Assisted generation keeps its own caches for both models, so the prefilled
+        # system prompt cache only applies to plain decoding
+        prefix = None if self.assistant_model else self._system_prefix(messages)
+        if prefix is not None and text.startswith(prefix[0]):
+            prefix_text, prefix_ids, prefix_cache = prefix
+            # The system prompt is already tokenized (and on device); only encode the rest
+            input_ids = torch.cat(
+                [prefix_ids, self._encode(text[len(prefix_text) :])], 1
+            )
+            # generate() extends the cache in place, so hand it a copy
+            past_key_values = copy.deepcopy(prefix_cache)
+        else:
+            input_ids = self._encode(text)
+
+        generate_kwargs = {
+            "input_ids": input_ids,
+            "do_sample": False,
+            "max_new_tokens": max_new_tokens,
+            "past_key_values": past_key_values,
+            "stopping_criteria": StoppingCriteriaList(
+                [_JsonObjectComplete(self.tokenizer, input_ids.shape[1])]
+            ),
+        }
+        if self.assistant_model is not None:
+            generate_kwargs["assistant_model"] = self.assistant_model
+        return generate_kwargs
+
+    def _encode(self, text: str) -> "torch.Tensor":
+        # Chat templates already contain the special tokens
+        return self.tokenizer(
+            text, add_special_tokens=False, return_tensors="pt"
+        ).input_ids.to(self.model.device)
+
+    def _system_prefix(
+        self, messages: List[Dict[str, str]]
+    ) -> Optional[Tuple[str, "torch.Tensor", Any]]:
+        """
+        Returns (templated text, token ids, prefilled KV cache) for the system prompt.
+        System prompts change rarely (per state), so each one is tokenized and prefilled
+        once and kept in a small LRU; generate then only has to process the user turn.
+        """
+        if not messages or messages[0]["role"] != "system":
+            return None
+
+        system_prompt = messages[0]["content"]
+        entry = self._prefix_caches.get(system_prompt)
+        if entry is None:
+            prefix_text = self.tokenizer.apply_chat_template(
+                messages[:1], tokenize=False
+            )
+            prefix_ids = self._encode(prefix_text)
+            # Prefilled eagerly: with the compiled forward, outputs live in CUDA graph
+            # buffers that the next replay overwrites, which would corrupt a kept cache
+            with torch.no_grad():
+                cache = self._eager_forward(
+                    input_ids=prefix_ids, use_cache=True
+                ).past_key_values
+            entry = (prefix_text, prefix_ids, cache)
+            self._prefix_caches[system_prompt] = entry
+            if len(self._prefix_caches) > PREFIX_CACHE_SIZE:
+                self._prefix_caches.popitem(last=False)
+        else:
+            self._prefix_caches.move_to_end(system_prompt)
+        return entry
@@ -1,17 +1,39 @@
 import json
-from typing import Any, Dict
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
 
 
 class PromptBuilder:
-    def __init__(self):
-        pass
+    def __init__(self, states: Optional[Dict[str, Dict[str, Any]]] = None):
+        # state name -> (state config it was rendered from, prompt)
+        self._prompt_cache: Dict[str, Tuple[Dict[str, Any], str]] = {}
+        # The prompt only depends on the (immutable) state config, so render all of them up front
+        for state_name, state_config in (states or {}).items():
+            # Action states never run NLU (and map results, not intents, to targets)
+            if state_config.get("type") != "action":
+                self.build_constraint_prompt(
+                    state_config, {"current_state": state_name}
+                )
 
     def build_constraint_prompt(
         self, state_config: Dict[str, Any], context_snapshot: Dict[str, Any]
     ) -> str:
         """
         Constructs the strict constraint prompt for the NLU.
+        Prompts are cached per state and re-rendered only if that state's config changes.
         """
+        state_name = context_snapshot["current_state"]
+        cached = self._prompt_cache.get(state_name)
+        if cached is not None and cached[0] is state_config:
+            return cached[1]
+
+        system_prompt = self._render_constraint_prompt(state_config, state_name)
+        self._prompt_cache[state_name] = (state_config, system_prompt)
+        return system_prompt
+
+    def _render_constraint_prompt(
+        self, state_config: Dict[str, Any], state_name: str
+    ) -> str:
         transitions = state_config.get("transitions", [])
         intent_list = [t["intent"] for t in transitions]
 
@@ -35,7 +57,7 @@ class PromptBuilder:
 You are a Dialog Decision Engine. Your task is to analyze User Input and extract structured data.
 
 Context:
-- Current State: {context_snapshot['current_state']}
+- Current State: {state_name}
 - State Description: {state_config.get('description', 'No description')}
 
 Constraints:
@@ -55,14 +77,53 @@ output strict JSON:
         return system_prompt
 
 
+# Distinct states whose GLiNER schema config is kept
+SCHEMA_CACHE_SIZE = 64
+
+
+class GlinerSchema(dict):
+    """
+    Schema config for GlinerClient.predict. Carries a content key computed once when it
+    is built, so the client can cache per schema without re-serializing it every turn.
+    Must not be mutated, as the key would no longer match.
+    """
+
+    __slots__ = ("key",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Key order is kept, as entity order is part of what the model sees
+        self.key = json.dumps(self, separators=(",", ":"))
+
+
 class GlinerPromptBuilder:
     def __init__(self):
-        pass
-
-    def build_schema(self, state_config: Dict[str, Any]) -> Dict[str, Any]:
+        # state name -> (state config it was built from, schema), least recently used first
+        self._schema_cache: "OrderedDict[str, Tuple[Dict[str, Any], GlinerSchema]]" = (
+            OrderedDict()
+        )
+
+    def build_schema(
+        self, state_config: Dict[str, Any], state_name: str
+    ) -> GlinerSchema:
         """
         Constructs the schema for Gliner extraction.
+        Cached per state and rebuilt only if that state's config changes; the returned
+        schema is shared and must not be mutated.
         """
+        cached = self._schema_cache.get(state_name)
+        if cached is not None and cached[0] is state_config:
+            self._schema_cache.move_to_end(state_name)
+            return cached[1]
+
+        schema = self._render_schema(state_config)
+        self._schema_cache[state_name] = (state_config, schema)
+        self._schema_cache.move_to_end(state_name)
+        if len(self._schema_cache) > SCHEMA_CACHE_SIZE:
+            self._schema_cache.popitem(last=False)
+        return schema
+
+    def _render_schema(self, state_config: Dict[str, Any]) -> GlinerSchema:
         transitions = state_config.get("transitions", [])
         intent_labels = [t["intent"] for t in transitions]
 
@@ -80,4 +141,4 @@ class GlinerPromptBuilder:
                 # Default description
                 entities[slot] = f"Extract the {slot} from the text"
 
-        return {"entities": entities, "classification": ("intent", intent_labels)}
+        return GlinerSchema(entities=entities, classification=("intent", intent_labels))
@@ -0,0 +1,58 @@
+from typing import Tuple
+
+from .llm_client import BaseLLMClient
+
+
+class VLLMClient(BaseLLMClient):
+    """
+    Chat client served by vLLM instead of transformers' generate.
+
+    Continuous batching and the paged KV cache let concurrent sessions share the GPU,
+    and prefix caching reuses prefilled system prompts. Exposes the same predict /
+    generate_response API as LLMClient, so it can be passed to DialogEngine unchanged.
+    """
+
+    def __init__(
+        self,
+        model_id: str = "LiquidAI/LFM2-350M-Extract",
+        gpu_memory_utilization: float = 0.85,
+    ):
+        try:
+            # Optional dependency, only needed when serving through vLLM
+            from vllm import LLM, SamplingParams
+        except ImportError as e:
+            raise ImportError(
+                "VLLMClient needs the optional vllm package: pip install vllm"
+            ) from e
+
+        self.model_id = model_id
+        print(f"Loading model with vLLM: {self.model_id}...")
+        self.llm = LLM(
+            model=self.model_id,
+            dtype="bfloat16",
+            gpu_memory_utilization=gpu_memory_utilization,
+            enable_prefix_caching=True,
+        )
+        self.tokenizer = self.llm.get_tokenizer()
+        self._sampling_params_type = SamplingParams
+        self._sampling_params = {}
+        super().__init__()
+        print("Model loaded.")
+
+    def _generate_uncached(
+        self, key: Tuple[Tuple[str, str], ...], max_new_tokens: int
+    ) -> str:
+        messages = [{"role": role, "content": content} for role, content in key]
+        prompt = self.tokenizer.apply_chat_template(
+            messages, add_generation_prompt=True, tokenize=False
+        )
+
+        params = self._sampling_params.get(max_new_tokens)
+        if params is None:
+            params = self._sampling_params_type(
+                temperature=0, max_tokens=max_new_tokens
+            )
+            self._sampling_params[max_new_tokens] = params
+
+        outputs = self.llm.generate([prompt], params, use_tqdm=False)
+        return outputs[0].outputs[0].text
@@ -4,10 +4,71 @@ This module provides functions to query and filter mock data for accounts,
 credit cards, and transactions.
 """
 
-from typing import Any, Optional
-from datetime import datetime
+from functools import lru_cache
+from typing import Any, Optional, Sequence
+from datetime import date, datetime
+
+from .mock_data import (
+    ACCOUNT_INDEX,
+    ACCOUNTS,
+    CARD_NAME_LOOKUP,
+    CATEGORY_INDEX,
+    CREDIT_CARDS,
+    MERCHANT_INDEX,
+    NAME_LOOKUP,
+    TXN_TABLE,
+)
+
+MONTH_NAMES = (
+    "",
+    "January",
+    "February",
+    "March",
+    "April",
+    "May",
+    "June",
+    "July",
+    "August",
+    "September",
+    "October",
+    "November",
+    "December",
+)
+
+# Lowercased display names, in search order, for the partial-match fallback of the name lookups
+_ACCOUNT_NAMES_LC = [
+    (account["name"].lower(), account)
+    for account in (*ACCOUNTS.values(), *CREDIT_CARDS.values())
+]
+_CARD_NAMES_LC = [(card["name"].lower(), card) for card in CREDIT_CARDS.values()]
+
+def _rows_containing(index: dict[str, tuple[int, ...]], needle: str) -> Sequence[int]:
+    """Row numbers whose indexed value contains needle, in table order.
+
+    Matching runs over the distinct values (a few dozen) rather than every row.
+    """
+    keys = [key for key in index if needle in key]
+    if len(keys) == 1:
+        return index[keys[0]]
+    return sorted(i for key in keys for i in index[key])
+
+
+def _find_by_name(
+    name_lower: str,
+    lookup: dict[str, dict[str, Any]],
+    names_lc: list[tuple[str, dict[str, Any]]],
+) -> Optional[dict[str, Any]]:
+    """Resolve a normalized name the way a linear scan would: the first entry whose key
+    or alias equals the name, or whose display name contains it, wins.
+    """
+    exact = lookup.get(name_lower)
 
-from .mock_data import ACCOUNTS, CREDIT_CARDS, TRANSACTIONS
+    # Only entries listed before the exact hit can still win through a partial name match
+    for name_lc, account in names_lc:
+        if account is exact or name_lower in name_lc:
+            return account
+
+    return None
 
 
 def find_account_by_name(name: str) -> Optional[dict[str, Any]]:
@@ -21,28 +82,7 @@ def find_account_by_name(name: str) -> Optional[dict[str, Any]]:
     """
     if not name:
         return None
-
-    name_lower = name.lower().strip()
-
-    # Check bank accounts first
-    for key, account in ACCOUNTS.items():
-        if name_lower == key:
-            return account
-        if name_lower in [a.lower() for a in account.get("aliases", [])]:
-            return account
-        if name_lower in account["name"].lower():
-            return account
-
-    # Then check credit cards
-    for key, card in CREDIT_CARDS.items():
-        if name_lower == key:
-            return card
-        if name_lower in [a.lower() for a in card.get("aliases", [])]:
-            return card
-        if name_lower in card["name"].lower():
-            return card
-
-    return None
+    return _find_account(name.lower().strip())
 
 
 def find_credit_card_by_name(name: str) -> Optional[dict[str, Any]]:
@@ -56,18 +96,19 @@ def find_credit_card_by_name(name: str) -> Optional[dict[str, Any]]:
     """
     if not name:
         return None
+    return _find_credit_card(name.lower().strip())
 
-    name_lower = name.lower().strip()
 
-    for key, card in CREDIT_CARDS.items():
-        if name_lower == key:
-            return card
-        if name_lower in [a.lower() for a in card.get("aliases", [])]:
-            return card
-        if name_lower in card["name"].lower():
-            return card
+# The same handful of names is looked up several times per turn. Entries are the live
+# account dicts, so balance updates show through; call cache_clear() if the data is reloaded.
+@lru_cache(maxsize=64)
+def _find_account(name_lower: str) -> Optional[dict[str, Any]]:
+    return _find_by_name(name_lower, NAME_LOOKUP, _ACCOUNT_NAMES_LC)
 
-    return None
+
+@lru_cache(maxsize=64)
+def _find_credit_card(name_lower: str) -> Optional[dict[str, Any]]:
+    return _find_by_name(name_lower, CARD_NAME_LOOKUP, _CARD_NAMES_LC)
 
 
 def get_all_accounts() -> list[dict[str, Any]]:
@@ -115,46 +156,53 @@ def filter_transactions(
     Returns:
         List of matching transaction dicts
     """
-    results = TRANSACTIONS.copy()
+    if not account_id and account_name:
+        account = find_account_by_name(account_name)
+        account_id = account["id"] if account else None
 
-    # Filter by merchant
-    if merchant:
-        merchant_lower = merchant.lower()
-        results = [t for t in results if merchant_lower in t["merchant"].lower()]
+    # Rows are sorted by date, so the date range is a contiguous slice of row numbers
+    lo, hi = TXN_TABLE.date_range(start_date, end_date)
 
-    # Filter by category
+    # Probe every index that applies, start from the smallest candidate list and
+    # intersect it with the others, so only rows matching all of them are visited
+    probes: list[Sequence[int]] = []
+    if account_id:
+        probes.append(ACCOUNT_INDEX.get(account_id, ()))
+    if merchant:
+        probes.append(_rows_containing(MERCHANT_INDEX, merchant.lower()))
     if category:
-        category_lower = category.lower()
-        results = [t for t in results if category_lower in t["category"].lower()]
+        probes.append(_rows_containing(CATEGORY_INDEX, category.lower()))
+
+    if probes:
+        probes.sort(key=len)
+        idx: Sequence[int] = probes[0]
+        for rows in probes[1:]:
+            if not idx:
+                break
+            row_set = set(rows)
+            idx = [i for i in idx if i in row_set]
+    else:
+        idx = range(lo, hi)
+
+    # Filter by date range (already applied when scanning the slice directly)
+    if (start_date or end_date) and not isinstance(idx, range):
+        idx = [i for i in idx if lo <= i < hi]
 
     # Filter by amount
     if amount_filter and amount_threshold is not None:
+        amounts = TXN_TABLE.amounts
         if amount_filter.lower() == "over":
-            results = [t for t in results if t["amount"] > amount_threshold]
+            idx = [i for i in idx if amounts[i] > amount_threshold]
         elif amount_filter.lower() == "under":
-            results = [t for t in results if t["amount"] < amount_threshold]
-
-    # Filter by date range
-    if start_date:
-        results = [t for t in results if t["date"] >= start_date]
-
-    if end_date:
-        results = [t for t in results if t["date"] <= end_date]
+            idx = [i for i in idx if amounts[i] < amount_threshold]
 
     # Filter by location
     if location:
         location_lower = location.lower()
-        results = [t for t in results if location_lower in t["location"].lower()]
+        locations_lc = TXN_TABLE.locations_lc
+        idx = [i for i in idx if location_lower in locations_lc[i]]
 
-    # Filter by account
-    if account_id:
-        results = [t for t in results if t["account_id"] == account_id]
-    elif account_name:
-        account = find_account_by_name(account_name)
-        if account:
-            results = [t for t in results if t["account_id"] == account["id"]]
-
-    return results
+    return TXN_TABLE.take(idx)
 
 
 def calculate_txn_summary(transactions: list[dict[str, Any]]) -> dict[str, Any]:
@@ -176,24 +224,36 @@ def calculate_txn_summary(transactions: list[dict[str, Any]]) -> dict[str, Any]:
             "latest_date": None,
         }
 
-    total = sum(t["amount"] for t in transactions)
+    # Single pass over the rows for all four aggregates
+    total = 0
+    accounts = set()
+    earliest = latest = transactions[0]["date"]
+    for t in transactions:
+        total += t["amount"]
+        accounts.add(t["account_id"])
+        txn_date = t["date"]
+        if txn_date < earliest:
+            earliest = txn_date
+        elif txn_date > latest:
+            latest = txn_date
     count = len(transactions)
-    unique_accounts = len(set(t["account_id"] for t in transactions))
-    dates = [t["date"] for t in transactions]
 
     return {
         "total": round(total, 2),
         "count": count,
         "avg": round(total / count, 2),
-        "accounts": unique_accounts,
-        "earliest_date": min(dates),
-        "latest_date": max(dates),
+        "accounts": len(accounts),
+        "earliest_date": earliest,
+        "latest_date": latest,
     }
 
 
+@lru_cache(maxsize=1024)
 def format_date_for_display(date_str: str) -> str:
     """Format a date string for human-readable display.
 
+    Results are memoized, since the same transaction and summary dates recur across turns.
+
     Args:
         date_str: Date in YYYY-MM-DD format
 
@@ -201,17 +261,30 @@ def format_date_for_display(date_str: str) -> str:
         Formatted date like "November 25th, 2024"
     """
     try:
-        dt = datetime.strptime(date_str, "%Y-%m-%d")
-        day = dt.day
-        suffix = "th" if 11 <= day <= 13 else {1: "st", 2: "nd", 3: "rd"}.get(day % 10, "th")
-        return dt.strftime(f"%B {day}{suffix}, %Y")
+        # Fast path for the canonical YYYY-MM-DD form; strptime handles anything looser
+        if (
+            len(date_str) == 10
+            and date_str[4] == date_str[7] == "-"
+            and (date_str[:4] + date_str[5:7] + date_str[8:]).isdigit()
+        ):
+            year, month, day = int(date_str[:4]), int(date_str[5:7]), int(date_str[8:])
+            date(year, month, day)  # Validates, e.g. rejects 2024-02-30
+        else:
+            dt = datetime.strptime(date_str, "%Y-%m-%d")
+            year, month, day = dt.year, dt.month, dt.day
     except ValueError:
         return date_str
 
+    suffix = "th" if 11 <= day <= 13 else {1: "st", 2: "nd", 3: "rd"}.get(day % 10, "th")
+    return f"{MONTH_NAMES[month]} {day}{suffix}, {year}"
+
 
+@lru_cache(maxsize=4096)
 def format_currency(amount: float) -> str:
     """Format an amount as currency.
 
+    Results are memoized, since the same balances and amounts are rendered repeatedly.
+
     Args:
         amount: Amount to format
 
@@ -5,8 +5,10 @@ and transactions. The data is designed to support the sample conversation
 and be extensible for future UI development.
 """
 
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Any
+from typing import Any, Iterable, Optional
 import random
 
 # Seed for reproducible data
@@ -101,6 +103,26 @@ CREDIT_CARDS: dict[str, dict[str, Any]] = {
     },
 }
 
+# =============================================================================
+# NAME LOOKUPS
+# =============================================================================
+
+
+def _build_name_lookup(*groups: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """Map each key and lowercased alias to its account; the first one listed wins a clash."""
+    lookup: dict[str, dict[str, Any]] = {}
+    for group in groups:
+        for key, account in group.items():
+            lookup.setdefault(key, account)
+            for alias in account.get("aliases", []):
+                lookup.setdefault(alias.lower(), account)
+    return lookup
+
+
+# Exact-match lookups for find_account_by_name (accounts, then cards) and find_credit_card_by_name
+NAME_LOOKUP = _build_name_lookup(ACCOUNTS, CREDIT_CARDS)
+CARD_NAME_LOOKUP = _build_name_lookup(CREDIT_CARDS)
+
 # =============================================================================
 # TRANSACTION GENERATION
 # =============================================================================
@@ -138,19 +160,28 @@ LOCATIONS = [
 ]
 
 
+# Merchants that only sell online; their transactions are always located "Online"
+_ONLINE_MERCHANTS = frozenset({"Amazon", "Netflix", "Spotify", "Disney+", "Steam", "Apple Music", "Expedia"})
+
+# Bank accounts and credit cards by key, in that order
+_ACCOUNTS_BY_KEY: dict[str, dict[str, Any]] = {**ACCOUNTS, **CREDIT_CARDS}
+
+# Realistic (min, max) amount per category
+AMOUNT_RANGES: dict[str, tuple[float, float]] = {
+    "Shopping": (15.00, 500.00),
+    "Groceries": (25.00, 200.00),
+    "Dining": (8.00, 100.00),
+    "Entertainment": (10.00, 80.00),
+    "Transportation": (5.00, 75.00),
+    "Utilities": (50.00, 300.00),
+    "Healthcare": (15.00, 200.00),
+    "Travel": (100.00, 1500.00),
+}
+
+
 def _generate_amount_for_category(category: str) -> float:
     """Generate a realistic amount based on category."""
-    ranges = {
-        "Shopping": (15.00, 500.00),
-        "Groceries": (25.00, 200.00),
-        "Dining": (8.00, 100.00),
-        "Entertainment": (10.00, 80.00),
-        "Transportation": (5.00, 75.00),
-        "Utilities": (50.00, 300.00),
-        "Healthcare": (15.00, 200.00),
-        "Travel": (100.00, 1500.00),
-    }
-    min_amt, max_amt = ranges.get(category, (10.00, 100.00))
+    min_amt, max_amt = AMOUNT_RANGES.get(category, (10.00, 100.00))
     return round(random.uniform(min_amt, max_amt), 2)
 
 
@@ -160,7 +191,7 @@ def _generate_transactions(num_transactions: int = 500) -> list[dict[str, Any]]:
     end_date = datetime(2024, 11, 25)  # Fixed date for reproducibility
     start_date = end_date - timedelta(days=730)  # ~24 months
 
-    all_account_ids = list(ACCOUNTS.keys()) + list(CREDIT_CARDS.keys())
+    all_account_ids = list(_ACCOUNTS_BY_KEY)
 
     for i in range(num_transactions):
         category = random.choice(CATEGORIES)
@@ -169,25 +200,21 @@ def _generate_transactions(num_transactions: int = 500) -> list[dict[str, Any]]:
 
         # Random date within range
         days_ago = random.randint(0, 730)
-        txn_date = end_date - timedelta(days=days_ago)
+        txn_iso = (end_date - timedelta(days=days_ago)).isoformat()
 
         # Random account
-        account_key = random.choice(all_account_ids)
-        if account_key in ACCOUNTS:
-            account = ACCOUNTS[account_key]
-        else:
-            account = CREDIT_CARDS[account_key]
+        account = _ACCOUNTS_BY_KEY[random.choice(all_account_ids)]
 
         # Location - online merchants are always "Online"
-        if merchant in ["Amazon", "Netflix", "Spotify", "Disney+", "Steam", "Apple Music", "Expedia"]:
+        if merchant in _ONLINE_MERCHANTS:
             location = "Online"
         else:
             location = random.choice(LOCATIONS)
 
         transactions.append({
             "id": f"txn_{i:05d}",
-            "date": txn_date.strftime("%Y-%m-%d"),
-            "datetime": txn_date.isoformat(),
+            "date": txn_iso[:10],  # YYYY-MM-DD prefix of the ISO timestamp
+            "datetime": txn_iso,
             "merchant": merchant,
             "category": category,
             "amount": amount,
@@ -231,11 +258,7 @@ def _generate_amazon_transactions() -> list[dict[str, Any]]:
 
     transactions = []
     for i, txn in enumerate(amazon_txns):
-        account_key = txn["account_key"]
-        if account_key in ACCOUNTS:
-            account = ACCOUNTS[account_key]
-        else:
-            account = CREDIT_CARDS[account_key]
+        account = _ACCOUNTS_BY_KEY[txn["account_key"]]
 
         transactions.append({
             "id": f"txn_amz_{i:03d}",
@@ -263,3 +286,79 @@ _base_transactions = [t for t in _base_transactions if t["merchant"] != "Amazon"
 # Combine and sort by date descending
 TRANSACTIONS: list[dict[str, Any]] = _base_transactions + _amazon_transactions
 TRANSACTIONS.sort(key=lambda x: x["date"], reverse=True)
+
+
+# =============================================================================
+# COLUMNAR VIEW
+# =============================================================================
+
+
+class TxnTable:
+    """Column-oriented (struct-of-arrays) view of a list of transactions.
+
+    Entry i of every column describes rows[i], so scans read one flat list per
+    predicate instead of hashing into a dict per row, and only the matching row
+    dicts are materialized at the end. Rows must be sorted by date, newest first.
+    """
+
+    __slots__ = (
+        "rows",
+        "dates",
+        "_dates_asc",
+        "amounts",
+        "account_ids",
+        "merchants_lc",
+        "categories_lc",
+        "locations_lc",
+    )
+
+    def __init__(self, rows: list[dict[str, Any]]):
+        self.rows = rows
+        self.dates = [t["date"] for t in rows]
+        self._dates_asc = self.dates[::-1]
+        self.amounts = [t["amount"] for t in rows]
+        self.account_ids = [t["account_id"] for t in rows]
+        # Lowercased once for the case-insensitive partial-match filters
+        self.merchants_lc = [t["merchant"].lower() for t in rows]
+        self.categories_lc = [t["category"].lower() for t in rows]
+        self.locations_lc = [t["location"].lower() for t in rows]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, i: int) -> dict[str, Any]:
+        return self.rows[i]
+
+    def date_range(self, start: Optional[str], end: Optional[str]) -> tuple[int, int]:
+        """Row numbers [lo, hi) whose date falls within [start, end], found by bisection."""
+        n = len(self.rows)
+        # Rows are newest first, so dates >= start form a prefix and dates <= end a suffix
+        hi = n - bisect_left(self._dates_asc, start) if start else n
+        lo = n - bisect_right(self._dates_asc, end) if end else 0
+        return lo, hi
+
+    def take(self, idx: Iterable[int]) -> list[dict[str, Any]]:
+        """Materialize the row dicts for the given row numbers."""
+        rows = self.rows
+        return [rows[i] for i in idx]
+
+
+TXN_TABLE = TxnTable(TRANSACTIONS)
+
+# =============================================================================
+# INDEXES
+# =============================================================================
+
+
+def _build_index(column: list[str]) -> dict[str, tuple[int, ...]]:
+    """Map each distinct value of a TXN_TABLE column to its row numbers."""
+    index: dict[str, list[int]] = defaultdict(list)
+    for i, value in enumerate(column):
+        index[value].append(i)
+    return {value: tuple(rows) for value, rows in index.items()}
+
+
+# Row numbers are ascending, so following an index keeps the date-descending order
+MERCHANT_INDEX = _build_index(TXN_TABLE.merchants_lc)
+CATEGORY_INDEX = _build_index(TXN_TABLE.categories_lc)
+ACCOUNT_INDEX = _build_index(TXN_TABLE.account_ids)
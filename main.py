@@ -4,16 +4,17 @@ This module sets up the dialog engine with all custom actions, validators,
 enrichers, conditions, and response functions for a personal finance assistant.
 """
 
+import argparse
 import sys
 import os
+import threading
 from datetime import datetime
+from types import MappingProxyType
 
 # Add current directory to path so imports work
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from core.engine import DialogEngine
-from core.gliner_client import GlinerClient
-from core.duckling_enrichers import DucklingEnricher
 from data.data_access import (
     find_account_by_name,
     find_credit_card_by_name,
@@ -44,15 +45,12 @@ def get_balance(context):
         account = find_account_by_name(account_name)
         if not account:
             return "not_found"
-        context.slots["account_data"] = account
-        context.slots["balance_type"] = "single"
+        context.set_slots(account_data=account, balance_type="single")
     else:
         # All accounts
         accounts = get_all_accounts()
         cards = get_all_credit_cards()
-        context.slots["all_accounts"] = accounts
-        context.slots["all_cards"] = cards
-        context.slots["balance_type"] = "all"
+        context.set_slots(all_accounts=accounts, all_cards=cards, balance_type="all")
 
     return "success"
 
@@ -107,8 +105,10 @@ def query_transactions(context):
     if not transactions:
         return "none_found"
 
-    context.slots["txn_results"] = transactions
-    context.slots["txn_summary"] = calculate_txn_summary(transactions)
+    context.set_slots(
+        txn_results=transactions,
+        txn_summary=calculate_txn_summary(transactions),
+    )
     return "found"
 
 
@@ -120,7 +120,7 @@ def execute_transfer(context):
     try:
         amount = float(amount)
     except (ValueError, TypeError):
-        context.slots["transfer_error"] = "Invalid amount"
+        context.set_slot("transfer_error", "Invalid amount")
         return "error"
 
     source_name = context.slots.get("source_account", "spending")
@@ -130,7 +130,7 @@ def execute_transfer(context):
     dest = find_account_by_name(dest_name)
 
     if not dest:
-        context.slots["transfer_error"] = f"Could not find destination account: {dest_name}"
+        context.set_slot("transfer_error", f"Could not find destination account: {dest_name}")
         return "invalid_account"
 
     if not source:
@@ -139,8 +139,10 @@ def execute_transfer(context):
     # Check sufficient funds
     available = source.get("available_balance", source.get("available_credit", 0))
     if amount > available:
-        context.slots["transfer_error"] = f"Insufficient funds. Available: {format_currency(available)}"
-        context.slots["source_balance"] = available
+        context.set_slots(
+            transfer_error=f"Insufficient funds. Available: {format_currency(available)}",
+            source_balance=available,
+        )
         return "insufficient_funds"
 
     # Mock successful transfer
@@ -150,13 +152,13 @@ def execute_transfer(context):
         if transfer_date != "today":
             transfer_date = transfer_date[:10]
 
-    context.slots["transfer_confirmation"] = {
+    context.set_slot("transfer_confirmation", {
         "amount": amount,
         "source": source["name"],
         "destination": dest["name"],
         "date": transfer_date,
         "confirmation_number": f"{datetime.now().strftime('%Y%m%d%H%M%S')[-6:]}",
-    }
+    })
 
     return "success"
 
@@ -170,13 +172,11 @@ def get_credit_card_info(context):
         card = find_credit_card_by_name(card_name)
         if not card:
             return "not_found"
-        context.slots["card_data"] = card
-        context.slots["card_type"] = "single"
+        context.set_slots(card_data=card, card_type="single")
     else:
         # All cards
         cards = get_all_credit_cards()
-        context.slots["all_cards"] = cards
-        context.slots["card_type"] = "all"
+        context.set_slots(all_cards=cards, card_type="all")
 
     return "success"
 
@@ -200,67 +200,76 @@ def validate_positive(value):
         return False
 
 
+def validate_positive_batch(values):
+    """Validate several values at once; plain numbers skip the unwrapping in validate_positive."""
+    return [
+        value > 0 if type(value) in (int, float) else validate_positive(value)
+        for value in values
+    ]
+
+
 # =============================================================================
 # ENRICHERS
 # =============================================================================
 
 
+# Map common variations to standard names
+_ACCT_ALIASES = MappingProxyType({
+    "checking": "spending",
+    "main": "spending",
+    "primary": "spending",
+    "debit": "spending",
+    "emergency": "savings",
+    "rainy day": "savings",
+    "high yield": "savings",
+    "travel fund": "vacation",
+    "trip": "vacation",
+    "holiday": "vacation",
+    "shared": "joint",
+    "household": "joint",
+    "family": "joint",
+})
+
+_CARD_ALIASES = MappingProxyType({
+    "travel": "travel_rewards",
+    "travel card": "travel_rewards",
+    "travel rewards": "travel_rewards",
+    "rewards": "travel_rewards",
+    "travel credit": "travel_rewards",
+    "cash back": "cash_back",
+    "cashback": "cash_back",
+    "everyday": "cash_back",
+    "daily": "cash_back",
+    "platinum": "business",
+    "work": "business",
+    "corporate": "business",
+})
+
+
+def _extract_text(value):
+    """Get the raw text from a slot value (plain string, entity dict or entity list)."""
+    match value:
+        case str():
+            return value
+        case dict():
+            return value.get("text", value.get("value", ""))
+        case list() if value:
+            first = value[0]
+            return first.get("text", str(first)) if isinstance(first, dict) else str(first)
+        case _:
+            return str(value) if value else ""
+
+
 def normalize_account_name(value):
     """Normalize account name to standard form."""
-    if isinstance(value, dict):
-        text = value.get("text", value.get("value", ""))
-    elif isinstance(value, list) and len(value) > 0:
-        text = value[0].get("text", str(value[0])) if isinstance(value[0], dict) else str(value[0])
-    else:
-        text = str(value) if value else ""
-
-    # Map common variations to standard names
-    aliases = {
-        "checking": "spending",
-        "main": "spending",
-        "primary": "spending",
-        "debit": "spending",
-        "emergency": "savings",
-        "rainy day": "savings",
-        "high yield": "savings",
-        "travel fund": "vacation",
-        "trip": "vacation",
-        "holiday": "vacation",
-        "shared": "joint",
-        "household": "joint",
-        "family": "joint",
-    }
-
-    normalized = text.lower().strip()
-    return aliases.get(normalized, normalized)
+    normalized = _extract_text(value).casefold().strip()
+    return _ACCT_ALIASES.get(normalized, normalized)
 
 
 def normalize_card_name(value):
     """Normalize credit card name to standard form."""
-    if isinstance(value, dict):
-        text = value.get("text", value.get("value", ""))
-    elif isinstance(value, list) and len(value) > 0:
-        text = value[0].get("text", str(value[0])) if isinstance(value[0], dict) else str(value[0])
-    else:
-        text = str(value) if value else ""
-
-    aliases = {
-        "travel": "travel_rewards",
-        "travel card": "travel_rewards",
-        "travel rewards": "travel_rewards",
-        "rewards": "travel_rewards",
-        "travel credit": "travel_rewards",
-        "cash back": "cash_back",
-        "cashback": "cash_back",
-        "everyday": "cash_back",
-        "daily": "cash_back",
-        "platinum": "business",
-        "work": "business",
-        "corporate": "business",
-    }
-
-    normalized = text.lower().strip()
-    return aliases.get(normalized, normalized)
+    normalized = _extract_text(value).casefold().strip()
+    return _CARD_ALIASES.get(normalized, normalized)
 
 
 # =============================================================================
@@ -268,10 +277,13 @@ def normalize_card_name(value):
 # =============================================================================
 
 
+_TRANSFER_REQUIRED_SLOTS = ("transfer_amount", "destination_account")
+
+
 def check_transfer_ready(context, target_state):
     """Check if transfer has required slots filled."""
-    required = ["transfer_amount", "destination_account"]
-    if all(context.slots.get(k) for k in required):
+    slots = context.slots
+    if all(slots.get(k) for k in _TRANSFER_REQUIRED_SLOTS):
         return target_state
     return context.current_state  # Stay here if not filled
 
@@ -361,35 +373,35 @@ def display_txn_summary(context):
     amount_threshold = context.slots.get("amount_threshold", "")
 
     # Build response
-    response = f"You spent {format_currency(summary.get('total', 0))}"
+    parts = [f"You spent {format_currency(summary.get('total', 0))}"]
 
     if summary.get("accounts", 0) > 1:
-        response += f" from your {summary['accounts']} accounts"
+        parts.append(f" from your {summary['accounts']} accounts")
 
     if merchant:
-        response += f" on purchases at {merchant}"
+        parts.append(f" on purchases at {merchant}")
     elif category:
-        response += f" on {category}"
+        parts.append(f" on {category}")
 
     if summary.get("earliest_date") and summary.get("latest_date"):
-        response += f" from {format_date_for_display(summary['earliest_date'])} to {format_date_for_display(summary['latest_date'])}"
+        parts.append(f" from {format_date_for_display(summary['earliest_date'])} to {format_date_for_display(summary['latest_date'])}")
 
     if amount_filter and amount_threshold:
         threshold_val = amount_threshold
         if isinstance(threshold_val, dict):
             threshold_val = threshold_val.get("value", 0)
-        response += f" (amounts {amount_filter} {format_currency(float(threshold_val))})"
+        parts.append(f" (amounts {amount_filter} {format_currency(float(threshold_val))})")
 
-    response += f", which was {summary.get('count', 0)} transactions total."
+    parts.append(f", which was {summary.get('count', 0)} transactions total.")
 
     # Calculate percentage of total spending (mock)
     total_spending = 99750.00  # Mock total spending
     percentage = (summary.get("total", 0) / total_spending) * 100
-    response += f" That's {percentage:.2f}% of your total spending."
+    parts.append(f" That's {percentage:.2f}% of your total spending.")
 
-    response += "\n\nWould you like to see the transaction details?"
+    parts.append("\n\nWould you like to see the transaction details?")
 
-    return response
+    return "".join(parts)
 
 
 def display_txn_list(context):
@@ -433,23 +445,29 @@ def display_txn_list(context):
     return "\n".join(lines)
 
 
+# Replies indexed by (has_amount, has_destination, has_source) as a 3-bit number
+_TRANSFER_INFO_PROMPTS = (
+    "How much would you like to transfer, and to which account?",
+    "How much would you like to transfer, and to which account?",
+    "How much would you like to transfer?",
+    "How much would you like to transfer?",
+    "Which account would you like to transfer to?",
+    "Which account would you like to transfer to?",
+    "Which account would you like to transfer from? (I'll use your spending account if you don't specify.)",
+    # All required info present
+    "Let me prepare that transfer for you.",
+)
+
+
 def ask_transfer_info(context):
     """Ask for missing transfer information."""
-    has_amount = bool(context.slots.get("transfer_amount"))
-    has_dest = bool(context.slots.get("destination_account"))
-    has_source = bool(context.slots.get("source_account"))
-
-    if not has_amount and not has_dest:
-        return "How much would you like to transfer, and to which account?"
-    if not has_amount:
-        return "How much would you like to transfer?"
-    if not has_dest:
-        return "Which account would you like to transfer to?"
-    if not has_source:
-        return "Which account would you like to transfer from? (I'll use your spending account if you don't specify.)"
-
-    # All required info present
-    return "Let me prepare that transfer for you."
+    slots = context.slots
+    idx = (
+        bool(slots.get("transfer_amount")) << 2
+        | bool(slots.get("destination_account")) << 1
+        | bool(slots.get("source_account"))
+    )
+    return _TRANSFER_INFO_PROMPTS[idx]
 
 
 def confirm_transfer_details(context):
@@ -556,9 +574,23 @@ def display_credit_card(context):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Personal finance assistant")
+    parser.add_argument(
+        "--prewarm",
+        action="store_true",
+        help="load and warm up the NLU model in the background while you type",
+    )
+    args = parser.parse_args()
+
     base_dir = os.path.dirname(os.path.abspath(__file__))
     config_path = os.path.join(base_dir, "config", "banking_flow.json")
-    client = GlinerClient()
+
+    # Imported here so the demos can import the handlers below without loading the model stack
+    from core.gliner_client import LazyGlinerClient
+    from core.duckling_enrichers import get_enricher
+
+    # The model is loaded on first use, or in the background from the start with --prewarm
+    client = LazyGlinerClient()
     engine = DialogEngine(config_path, client)
 
     # Register Actions
@@ -569,9 +601,10 @@ def main():
 
     # Register Validators
     engine.validators.register_validator("validate_positive", validate_positive)
+    engine.validators.register_batch_validator("validate_positive", validate_positive_batch)
 
     # Register Enrichers
-    duckling = DucklingEnricher()
+    duckling = get_enricher()
     engine.validators.register_enricher("enrich_amount_of_money", duckling.enrich_amount_of_money)
     engine.validators.register_enricher("enrich_time", duckling.enrich_time)
     engine.validators.register_enricher("normalize_account_name", normalize_account_name)
@@ -593,7 +626,16 @@ def main():
     engine.responses.register("display_transfer_result", display_transfer_result)
     engine.responses.register("display_credit_card", display_credit_card)
 
+    # Everything is registered; bind the handlers directly
+    engine.freeze()
+
     context = engine.start_session("session_123")
+    warmup = None
+    if args.prewarm:
+        # Load and warm up the model while the user types their first message. Not a
+        # daemon thread, so quitting early waits for the load instead of killing it
+        warmup = threading.Thread(target=engine.warmup)
+        warmup.start()
 
     print("--- Personal Finance Assistant (Type 'exit' to quit) ---")
 
@@ -609,6 +651,9 @@ def main():
         response = engine.process_turn(user_input, context)
         print(f"Bot: {response}")
 
+    if warmup is not None:
+        warmup.join()
+
 
 if __name__ == "__main__":
     main()
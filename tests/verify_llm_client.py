@@ -1,3 +1,4 @@
+import json
 import os
 import sys
 
@@ -100,5 +101,45 @@ def test_llm_client():
     except Exception as e:
         print(f"Generate Test FAILED with error: {e}")
 
+
+def test_prefix_cache():
+    print("\n--- Testing prefilled system prompt cache against plain generate ---")
+    try:
+        from core.llm_client import LLMClient, MAX_NEW_TOKENS
+        client = LLMClient()
+    except Exception as e:
+        print(f"Failed to initialize LLMClient: {e}")
+        return
+
+    system_prompt = PromptBuilder().build_constraint_prompt(
+        {"transitions": [{"intent": "check_balance"}, {"intent": "transfer_money"}]},
+        {"current_state": "start"}
+    )
+    # Same system prompt for both: the first predict prefills its cache, the second reuses it
+    for user_input in ["What's my balance?", "Send 50 pounds to savings"]:
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"User Input: {user_input}"},
+        ]
+        # Reference: the whole conversation through plain generate, no prefilled cache
+        input_ids = client.tokenizer.apply_chat_template(
+            messages, add_generation_prompt=True, return_tensors="pt"
+        ).to(client.model.device)
+        output = client.model.generate(input_ids, do_sample=False, max_new_tokens=MAX_NEW_TOKENS)
+        reference = client.tokenizer.decode(output[0][input_ids.shape[1]:], skip_special_tokens=True)
+        start = reference.find("{")
+        if start == -1:
+            expected = {"intent": "UNKNOWN", "entities": {}}
+        else:
+            expected = json.JSONDecoder().raw_decode(reference, start)[0]
+
+        result = client.predict(user_input, system_prompt)
+        if result == expected:
+            print(f"Prefix Cache Test PASSED: {user_input!r}")
+        else:
+            print(f"Prefix Cache Test FAILED: {user_input!r}\n  plain: {expected!r}\n  cached: {result!r}")
+
+
 if __name__ == "__main__":
     test_llm_client()
+    test_prefix_cache()